@@ -0,0 +1,43 @@
+"""unique (stock_id, period) keys on quarterly, annual and shareholding rows
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KEYS = [
+    ("quarterly_results", "quarter", "uq_quarterly_results_stock_quarter"),
+    ("annual_results", "fiscal_year", "uq_annual_results_stock_fiscal_year"),
+    ("shareholding_patterns", "quarter", "uq_shareholding_patterns_stock_quarter"),
+]
+
+
+def upgrade() -> None:
+    for table, period, name in KEYS:
+        # Tables may predate the constraint (created by create_all); drop duplicate periods first.
+        op.execute(
+            f"DELETE FROM {table} a USING {table} b "
+            f"WHERE a.stock_id = b.stock_id AND a.{period} = b.{period} AND a.id < b.id"
+        )
+        op.execute(
+            f"""
+            DO $$ BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{name}') THEN
+                    ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE (stock_id, {period});
+                END IF;
+            END $$;
+            """
+        )
+
+
+def downgrade() -> None:
+    for table, _, name in KEYS:
+        op.drop_constraint(name, table, type_="unique")
@@ -0,0 +1,36 @@
+"""screener indexes on stocks: market-cap ordering, sector, ratio filters
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_stocks_market_cap_id", "(market_cap DESC NULLS LAST, id DESC)"),
+    ("ix_stocks_sector_market_cap_id", "(sector, market_cap DESC NULLS LAST, id DESC)"),
+    ("ix_stocks_pe_ratio", "(pe_ratio) WHERE pe_ratio IS NOT NULL"),
+    ("ix_stocks_roce", "(roce) WHERE roce IS NOT NULL"),
+    ("ix_stocks_roe", "(roe) WHERE roe IS NOT NULL"),
+    ("ix_stocks_debt_to_equity", "(debt_to_equity) WHERE debt_to_equity IS NOT NULL"),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the screener readable while the indexes build; it cannot run in a transaction.
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON stocks {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,26 @@
+"""realized_gain total on portfolio_valuations
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # portfolio_valuations and realized_gains come from create_all; only valuations created before this column need it.
+    op.execute(
+        "ALTER TABLE IF EXISTS portfolio_valuations "
+        "ADD COLUMN IF NOT EXISTS realized_gain DOUBLE PRECISION NOT NULL DEFAULT 0"
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE IF EXISTS portfolio_valuations DROP COLUMN IF EXISTS realized_gain")
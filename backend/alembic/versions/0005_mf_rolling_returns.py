@@ -0,0 +1,27 @@
+"""rolling 1y return columns on mf_schemes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ["rolling_1y_avg", "rolling_1y_min"]
+
+
+def upgrade() -> None:
+    # The partitioned mf_nav_history table comes from create_all; existing scheme tables need the new columns.
+    for column in COLUMNS:
+        op.execute(f"ALTER TABLE IF EXISTS mf_schemes ADD COLUMN IF NOT EXISTS {column} DOUBLE PRECISION")
+
+
+def downgrade() -> None:
+    for column in COLUMNS:
+        op.execute(f"ALTER TABLE IF EXISTS mf_schemes DROP COLUMN IF EXISTS {column}")
@@ -1,17 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+import hashlib
+import os
+import aiofiles.tempfile
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from app.database import get_db
 from app.models.mutual_fund import MFScheme, UserMFHolding
-from app.schemas.mutual_fund import MFSchemeResponse, UserMFHoldingResponse, MFAnalysis
+from app.schemas.mutual_fund import CASUploadResponse, MFSchemeResponse, UserMFHoldingResponse, MFAnalysis
 from app.deps import get_current_user
 from app.models.user import User
+from app.services import cas_import, nav_returns
 
 router = APIRouter()
 
 
+def _cas_values(holdings: list[UserMFHolding]) -> dict[str, float]:
+    # XIRR needs the statement's transactions, which only CAS-imported holdings have; folios of a scheme add up.
+    values: dict[str, float] = {}
+    for h in holdings:
+        if h.source == "cas" and h.scheme:
+            values[h.scheme_id] = values.get(h.scheme_id, 0.0) + h.units * (h.scheme.nav or h.avg_nav)
+    return values
+
+
 @router.get("/holdings", response_model=list[UserMFHoldingResponse])
 async def get_mf_holdings(
     db: AsyncSession = Depends(get_db),
@@ -23,6 +37,7 @@ async def get_mf_holdings(
         .where(UserMFHolding.user_id == current_user.id)
     )
     holdings = result.scalars().all()
+    xirrs = await nav_returns.holding_xirrs(db, current_user.id, _cas_values(holdings))
 
     return [
         UserMFHoldingResponse(
@@ -34,6 +49,7 @@ async def get_mf_holdings(
             current_value=h.units * (h.scheme.nav or h.avg_nav) if h.scheme else None,
             pnl=(h.units * (h.scheme.nav or h.avg_nav) - h.invested_amount) if h.scheme else None,
             rating=h.scheme.computed_rating if h.scheme else None,
+            xirr=xirrs.get(h.scheme_id) if h.source == "cas" else None,
             source=h.source,
         )
         for h in holdings
@@ -51,6 +67,7 @@ async def get_mf_analysis(
         .where(UserMFHolding.user_id == current_user.id)
     )
     holdings = result.scalars().all()
+    xirrs = await nav_returns.holding_xirrs(db, current_user.id, _cas_values(holdings))
 
     total_invested = 0.0
     total_current_value = 0.0
@@ -76,11 +93,13 @@ async def get_mf_analysis(
             current_value=current_val,
             pnl=current_val - h.invested_amount,
             rating=h.scheme.computed_rating if h.scheme else None,
+            xirr=xirrs.get(h.scheme_id) if h.source == "cas" else None,
             source=h.source,
         )
         holding_responses.append(resp)
 
-        if h.scheme and h.scheme.return_1y and h.scheme.category_avg_1y:
+        # category_avg_1y is precomputed by mf_analyzer after each NAV ingest.
+        if h.scheme and h.scheme.return_1y is not None and h.scheme.category_avg_1y is not None:
             if h.scheme.return_1y < h.scheme.category_avg_1y:
                 underperformers.append(resp)
 
@@ -94,13 +113,46 @@ async def get_mf_analysis(
     )
 
 
-@router.post("/upload-cas")
+@router.post("/upload-cas", status_code=202, response_model=CASUploadResponse)
 async def upload_cas_pdf(
     file: UploadFile = File(...),
+    password: str | None = Form(None, description="CAS PDFs are usually locked with the investor's PAN"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Please upload a PDF file")
 
-    return {"status": "ok", "message": "CAS parsing not yet implemented"}
+    # Spooled to disk in chunks while hashing, so a large statement is never held in memory whole.
+    digest, size = hashlib.sha256(), 0
+    async with aiofiles.tempfile.NamedTemporaryFile("wb", suffix=".pdf", delete=False) as tmp:
+        while chunk := await file.read(cas_import.CHUNK_BYTES):
+            digest.update(chunk)
+            size += len(chunk)
+            await tmp.write(chunk)
+    try:
+        upload, created = await cas_import.create_upload(
+            db, current_user.id, tmp.name, digest.hexdigest(), size, file.filename,
+        )
+    finally:
+        os.unlink(tmp.name)
+
+    if not created:
+        return JSONResponse(status_code=200, content=cas_import.upload_response(upload, deduplicated=True).model_dump(mode="json"))
+    try:
+        await cas_import.enqueue_ingest(upload.id, password)
+    except Exception:
+        raise HTTPException(status_code=503, detail="Could not queue the statement for import; please try again")
+    return cas_import.upload_response(upload)
+
+
+@router.get("/cas-uploads/{upload_id}", response_model=CASUploadResponse)
+async def get_cas_upload(
+    upload_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    upload = await cas_import.get_upload(db, current_user.id, upload_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="CAS upload not found")
+    return cas_import.upload_response(upload)
@@ -1,43 +1,28 @@
-import logging
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
-from sqlalchemy.orm import selectinload
-
-from app.database import get_db
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select, union
+
+from app.config import settings
+from app.database import async_session
+from app.schemas.stock import StockDetail, StockListResponse, StockSuggestion, ScrapeJobResponse
+from app.deps import credentials_exception, decode_user_id, get_current_user, get_current_user_id
+from app.models.portfolio import Holding
 from app.models.stock import Stock
-from app.schemas.stock import StockListItem, StockDetail, StockListResponse
-from app.deps import get_current_user
 from app.models.user import User
-from app.services.scraper.screener_scraper import ScreenerScraper
-
-logger = logging.getLogger(__name__)
+from app.models.watchlist import Watchlist
+from app.services import price_stream, scrape_jobs, stock_service
 
 router = APIRouter()
 
 
-async def _scrape_stock(symbol: str, db: AsyncSession) -> Stock:
-    scraper = ScreenerScraper(db)
-    stock = await scraper.scrape_stock(symbol.upper())
-    return stock
-
-
-async def _load_stock_detail(symbol: str, db: AsyncSession) -> Stock | None:
-    result = await db.execute(
-        select(Stock)
-        .where(Stock.symbol == symbol.upper())
-        .options(
-            selectinload(Stock.quarterly_results),
-            selectinload(Stock.annual_results),
-            selectinload(Stock.shareholding_patterns),
-            selectinload(Stock.peers),
-        )
-    )
-    return result.scalar_one_or_none()
+def _accepted(job: dict) -> JSONResponse:
+    return JSONResponse(status_code=202, content=ScrapeJobResponse(**job).model_dump(mode="json"))
 
 
-def _stock_to_detail(stock: Stock) -> StockDetail:
-    return StockDetail.model_validate(stock)
+async def _job_response(job: dict) -> ScrapeJobResponse:
+    stock = await stock_service.get_stock_detail(job["symbol"]) if job["status"] == "success" else None
+    return ScrapeJobResponse(**job, stock=stock)
 
 
 @router.get("", response_model=StockListResponse)
@@ -54,117 +39,121 @@ async def list_stocks(
     min_roe: float | None = None,
     min_market_cap: float | None = None,
     max_debt_to_equity: float | None = None,
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = Query(None, description="next_cursor from the previous page; overrides page"),
+    with_total: bool = True,
     current_user: User = Depends(get_current_user),
 ):
-    query = select(Stock)
-
-    if search:
-        query = query.where(or_(
-            Stock.symbol.ilike(f"%{search}%"),
-            Stock.name.ilike(f"%{search}%"),
-        ))
-    if sector:
-        query = query.where(Stock.sector == sector)
-    if min_pe is not None:
-        query = query.where(Stock.pe_ratio >= min_pe)
-    if max_pe is not None:
-        query = query.where(Stock.pe_ratio <= max_pe)
-    if min_roce is not None:
-        query = query.where(Stock.roce >= min_roce)
-    if min_roe is not None:
-        query = query.where(Stock.roe >= min_roe)
-    if min_market_cap is not None:
-        query = query.where(Stock.market_cap >= min_market_cap)
-    if max_debt_to_equity is not None:
-        query = query.where(Stock.debt_to_equity <= max_debt_to_equity)
-
-    count_result = await db.execute(select(func.count()).select_from(query.subquery()))
-    total = count_result.scalar() or 0
-
-    if sort_by:
-        sort_col = getattr(Stock, sort_by, Stock.market_cap)
-        query = query.order_by(sort_col.desc() if sort_order == "desc" else sort_col.asc())
-    else:
-        query = query.order_by(Stock.market_cap.desc().nullslast())
-
-    query = query.offset((page - 1) * page_size).limit(page_size)
-    result = await db.execute(query)
-    stocks = result.scalars().all()
-
-    return StockListResponse(
-        items=[StockListItem.model_validate(s) for s in stocks],
-        total=total,
-        page=page,
-        page_size=page_size,
+    params = stock_service.normalize_list_params(
+        page=page, page_size=page_size, search=search, sector=sector,
+        sort_by=sort_by, sort_order=sort_order, cursor=cursor, with_total=with_total,
+        min_pe=min_pe, max_pe=max_pe, min_roce=min_roce, min_roe=min_roe,
+        min_market_cap=min_market_cap, max_debt_to_equity=max_debt_to_equity,
     )
+    try:
+        return await stock_service.list_stocks(params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/{symbol}", response_model=StockDetail)
-async def get_stock(
-    symbol: str,
-    db: AsyncSession = Depends(get_db),
+@router.get("/typeahead", response_model=list[StockSuggestion])
+async def typeahead(
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(8, ge=1, le=20),
     current_user: User = Depends(get_current_user),
 ):
-    stock = await _load_stock_detail(symbol, db)
+    return await stock_service.typeahead(q, limit)
 
-    if not stock:
-        # Auto-scrape from screener.in
-        try:
-            await _scrape_stock(symbol, db)
-        except Exception:
-            logger.exception("Failed to scrape stock %s", symbol)
-            raise HTTPException(status_code=404, detail="Stock not found")
-        stock = await _load_stock_detail(symbol, db)
 
-    if not stock:
-        raise HTTPException(status_code=404, detail="Stock not found")
+@router.get("/jobs/{job_id}", response_model=ScrapeJobResponse)
+async def get_scrape_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Seconds to long-poll for the job to finish"),
+    user_id: str = Depends(get_current_user_id),
+):
+    # No session is held while waiting, so long-pollers can't exhaust the connection pool.
+    job = await scrape_jobs.wait_for_job(job_id, wait) if wait else await scrape_jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scrape job not found")
+    return await _job_response(job)
 
-    return _stock_to_detail(stock)
 
+@router.get("/jobs/{job_id}/events")
+async def stream_scrape_job(
+    job_id: str,
+    user_id: str = Depends(get_current_user_id),
+):
+    if not await scrape_jobs.get_job(job_id):
+        raise HTTPException(status_code=404, detail="Scrape job not found")
+
+    async def events():
+        last_status = None
+        while True:
+            job = await scrape_jobs.get_job(job_id)
+            if job is None:
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                payload = await _job_response(job)
+                yield f"event: status\ndata: {payload.model_dump_json()}\n\n"
+            if last_status in scrape_jobs.TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/prices/stream")
+async def stream_prices(
+    token: str = Query(..., description="Access token; EventSource cannot send an Authorization header"),
+):
+    """SSE feed of current_price changes for the stocks the user holds or watches."""
+    user_id = decode_user_id(token)
+    # A short-lived session, so idle streams don't each pin a database connection.
+    async with async_session() as db:
+        if await db.get(User, user_id) is None:
+            raise credentials_exception()
+        followed = union(
+            select(Holding.stock_id).where(Holding.user_id == user_id),
+            select(Watchlist.stock_id).where(Watchlist.user_id == user_id),
+        )
+        result = await db.execute(select(Stock.symbol, Stock.current_price).where(Stock.id.in_(followed)))
+        snapshot = [{"symbol": symbol, "price": price} for symbol, price in result.all()]
 
-@router.post("/scrape/{symbol}", response_model=StockDetail)
-async def scrape_stock(
+    async def events():
+        with price_stream.subscribe({s["symbol"] for s in snapshot}) as subscriber:
+            async for chunk in price_stream.stream_events(subscriber, snapshot, settings.price_stream_heartbeat_seconds):
+                yield chunk
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{symbol}", response_model=StockDetail, responses={202: {"model": ScrapeJobResponse}})
+async def get_stock(
     symbol: str,
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    try:
-        await _scrape_stock(symbol, db)
-    except Exception:
-        logger.exception("Failed to scrape stock %s", symbol)
-        raise HTTPException(status_code=404, detail=f"Could not scrape stock '{symbol}' from screener.in")
+    detail = await stock_service.get_stock_detail(symbol)
+    if detail:
+        return detail
+
+    # Unknown symbol: scrape from screener.in in the background.
+    return _accepted(await scrape_jobs.enqueue_scrape(symbol))
 
-    stock = await _load_stock_detail(symbol, db)
-    if not stock:
-        raise HTTPException(status_code=404, detail="Stock not found after scraping")
 
-    return _stock_to_detail(stock)
+@router.post("/scrape/{symbol}", status_code=202, response_model=ScrapeJobResponse)
+async def scrape_stock(
+    symbol: str,
+    current_user: User = Depends(get_current_user),
+):
+    return _accepted(await scrape_jobs.enqueue_scrape(symbol))
 
 
-@router.post("/search-scrape", response_model=StockListResponse)
+@router.post("/search-scrape", status_code=202, response_model=ScrapeJobResponse)
 async def search_scrape(
     term: str = Query(...),
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Attempt to scrape the search term as a symbol if not found in DB."""
-    try:
-        await _scrape_stock(term, db)
-    except Exception:
-        logger.exception("Failed to scrape stock %s", term)
-        raise HTTPException(status_code=404, detail=f"Could not find or scrape '{term}'")
-
-    result = await db.execute(
-        select(Stock).where(Stock.symbol == term.upper())
-    )
-    stock = result.scalar_one_or_none()
-    if not stock:
-        raise HTTPException(status_code=404, detail=f"Could not find '{term}' after scraping")
-
-    return StockListResponse(
-        items=[StockListItem.model_validate(stock)],
-        total=1,
-        page=1,
-        page_size=20,
-    )
+    """Queue a scrape of the search term as a symbol if not found in DB."""
+    return _accepted(await scrape_jobs.enqueue_scrape(term))
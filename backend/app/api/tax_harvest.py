@@ -1,4 +1,3 @@
-from datetime import date, timedelta
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -10,13 +9,10 @@ from app.models.portfolio import Holding
 from app.schemas.tax_harvest import TaxHarvestRecommendationResponse, TaxHarvestSummary, TaxHarvestAction
 from app.deps import get_current_user
 from app.models.user import User
+from app.services import tax_harvest_engine
 
 router = APIRouter()
 
-STCG_TAX_RATE = 0.15
-LTCG_TAX_RATE = 0.10
-
-
 @router.get("/summary", response_model=TaxHarvestSummary)
 async def get_tax_harvest_summary(
     db: AsyncSession = Depends(get_db),
@@ -62,11 +58,14 @@ async def get_tax_harvest_summary(
             created_at=rec.created_at,
         ))
 
+    realized_stcg, realized_ltcg = await tax_harvest_engine.realized_gains(db, current_user.id)
     return TaxHarvestSummary(
         total_unrealized_loss=total_unrealized_loss,
         total_estimated_tax_saving=total_estimated_tax_saving,
         stcg_harvestable=stcg_harvestable,
         ltcg_harvestable=ltcg_harvestable,
+        realized_stcg=realized_stcg,
+        realized_ltcg=realized_ltcg,
         recommendations=rec_responses,
     )
 
@@ -76,59 +75,7 @@ async def analyze_tax_harvest(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    result = await db.execute(
-        select(Holding)
-        .options(selectinload(Holding.stock))
-        .where(Holding.user_id == current_user.id)
-    )
-    holdings = result.scalars().all()
-
-    today = date.today()
-    one_year_ago = today - timedelta(days=365)
-
-    await db.execute(
-        select(TaxHarvestRecommendation)
-        .where(TaxHarvestRecommendation.user_id == current_user.id)
-    )
-
-    created_count = 0
-    for holding in holdings:
-        if not holding.stock or not holding.stock.current_price:
-            continue
-
-        current_value = holding.quantity * holding.stock.current_price
-        invested_value = holding.quantity * holding.buy_price
-        pnl = current_value - invested_value
-
-        if pnl >= 0:
-            continue
-
-        unrealized_loss = abs(pnl)
-        is_short_term = holding.buy_date > one_year_ago
-        tax_rate = STCG_TAX_RATE if is_short_term else LTCG_TAX_RATE
-        estimated_tax_saving = unrealized_loss * tax_rate
-
-        existing = await db.execute(
-            select(TaxHarvestRecommendation).where(
-                TaxHarvestRecommendation.user_id == current_user.id,
-                TaxHarvestRecommendation.holding_id == holding.id,
-                TaxHarvestRecommendation.status == "pending",
-            )
-        )
-        if existing.scalar_one_or_none():
-            continue
-
-        rec = TaxHarvestRecommendation(
-            user_id=current_user.id,
-            holding_id=holding.id,
-            unrealized_loss=unrealized_loss,
-            estimated_tax_saving=estimated_tax_saving,
-            is_short_term=is_short_term,
-        )
-        db.add(rec)
-        created_count += 1
-
-    await db.commit()
+    created_count = await tax_harvest_engine.analyze(db, current_user.id)
     return {"status": "ok", "recommendations_created": created_count}
 
 
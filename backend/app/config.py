@@ -9,7 +9,40 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
     cors_origins: list[str] = ["http://localhost:5173", "https://axelrod77.github.io"]
-    scraper_rate_limit_seconds: float = 3.0
+    scraper_concurrency: int = 8
+    scraper_requests_per_second: float = 2.0
+    scraper_burst: int = 2
+    scraper_shared_client: bool = True
+    scraper_http2: bool = False
+    scraper_timeout_seconds: float = 30.0
+    scraper_max_connections: int = 20
+    scraper_max_keepalive_connections: int = 10
+    scraper_keepalive_expiry_seconds: float = 30.0
+    scraper_parser_backend: str = "lxml"
+    scrape_lock_timeout_seconds: int = 60
+    scrape_wait_timeout_seconds: int = 180
+    stock_detail_cache_ttl_seconds: int = 900
+    stock_list_cache_ttl_seconds: int = 300
+    stock_typeahead_timeout_ms: int = 150
+    price_stream_heartbeat_seconds: float = 15.0
+    tax_harvest_batch_size: int = 500
+    tax_harvest_batch_concurrency: int = 4
+    cas_ingest_stale_seconds: int = 900
+    amfi_nav_url: str = "https://www.amfiindia.com/spages/NAVAll.txt"
+    amfi_nav_batch_size: int = 2000
+    nav_returns_chunk_size: int = 1000
+    screener_index_enabled: bool = True
+    screener_index_max_age_seconds: float = 600.0
+    screener_index_min_rebuild_seconds: float = 5.0
+    cache_codec: str = "orjson"
+    cache_compression: str = "zstd"
+    cache_compress_min_bytes: int = 2048
+    cache_local_ttl_seconds: float = 30.0
+    cache_local_max_entries: int = 2048
+    cpu_pool_kind: str = "process"
+    cpu_pool_workers: int = 2
+    cpu_pool_max_pending: int = 16
+    celery_cpu_pool_kind: str = "thread"
     scraper_user_agents: list[str] = [
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
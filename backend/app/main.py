@@ -1,12 +1,17 @@
+import asyncio
 import traceback
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from app import metrics
 from app.config import settings
 from app.database import engine
+from app.deps import get_current_user_id
 from app.models import Base
+from app.services import cpu_pool, price_stream, screener_index, stock_service
 from app.api import auth, stocks, watchlist, portfolio, mutual_funds, tax_harvest
+from app.services.scraper import cache, http_client
 
 
 @asynccontextmanager
@@ -14,7 +19,18 @@ async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     print("Database tables created successfully")
+    await http_client.open_client()
+    cpu_pool.start_pool()
+    lag_monitor = asyncio.create_task(metrics.monitor_event_loop_lag())
+    cache_listener = asyncio.create_task(cache.listen_for_invalidations())
+    price_listener = asyncio.create_task(price_stream.listen_for_prices())
+    screener_index.schedule_rebuild(stock_service.current_generation)
     yield
+    price_listener.cancel()
+    cache_listener.cancel()
+    lag_monitor.cancel()
+    cpu_pool.shutdown_pool()
+    await http_client.close_client()
 
 
 app = FastAPI(title="Ekphrasis", version="0.1.0", lifespan=lifespan)
@@ -45,3 +61,9 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.get("/api/health")
 async def health():
     return {"status": "ok"}
+
+
+# Metrics expose internals (latencies, cache and error rates), so only signed-in users may read them.
+@app.get("/api/metrics", dependencies=[Depends(get_current_user_id)])
+async def get_metrics():
+    return metrics.snapshot()
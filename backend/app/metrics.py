@@ -0,0 +1,73 @@
+"""Process-local counters and latency histograms exposed on /api/metrics."""
+import asyncio
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+class LatencyStats:
+    def __init__(self, window: int = 2048):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.samples)
+
+        def pct(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+        return {
+            "count": self.count,
+            "mean_ms": (self.total / self.count * 1000) if self.count else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": self.max * 1000,
+        }
+
+
+_latencies: dict[str, LatencyStats] = defaultdict(LatencyStats)
+_counters: dict[str, int] = defaultdict(int)
+
+
+def observe(name: str, seconds: float):
+    _latencies[name].observe(seconds)
+
+
+def incr(name: str, amount: int = 1):
+    _counters[name] += amount
+
+
+@contextmanager
+def timed(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def snapshot(prefix: str = "") -> dict:
+    return {
+        "counters": {k: v for k, v in sorted(_counters.items()) if k.startswith(prefix)},
+        "latency": {k: v.snapshot() for k, v in sorted(_latencies.items()) if k.startswith(prefix)},
+    }
+
+
+async def monitor_event_loop_lag(interval: float = 0.1):
+    """Record how late the loop wakes up from a fixed sleep; blocking work shows up as lag."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        observe("event_loop.lag", max(0.0, loop.time() - expected))
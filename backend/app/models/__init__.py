@@ -6,8 +6,8 @@ class Base(DeclarativeBase):
 
 
 from app.models.user import User
-from app.models.stock import Stock, QuarterlyResult, AnnualResult, ShareholdingPattern, StockPeer, PriceHistory
+from app.models.stock import Stock, QuarterlyResult, AnnualResult, ShareholdingPattern, StockPeer, PriceHistory, ScrapeState
 from app.models.watchlist import Watchlist
-from app.models.portfolio import Holding
-from app.models.mutual_fund import MFScheme, UserMFHolding
+from app.models.portfolio import Holding, PortfolioValuation, RealizedGain
+from app.models.mutual_fund import MFScheme, MFNavHistory, UserMFHolding, MFTransaction, CASUpload, CASUploadChunk
 from app.models.tax_harvest import TaxHarvestRecommendation
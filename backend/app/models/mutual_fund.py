@@ -1,6 +1,6 @@
 import uuid
-from datetime import datetime
-from sqlalchemy import String, Float, DateTime, ForeignKey
+from datetime import datetime, date
+from sqlalchemy import String, Float, Integer, DateTime, Date, ForeignKey, JSON, LargeBinary, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models import Base
 
@@ -24,12 +24,24 @@ class MFScheme(Base):
     category_avg_3y: Mapped[float | None] = mapped_column(Float)
     category_avg_5y: Mapped[float | None] = mapped_column(Float)
     category_median_expense: Mapped[float | None] = mapped_column(Float)
+    rolling_1y_avg: Mapped[float | None] = mapped_column(Float)
+    rolling_1y_min: Mapped[float | None] = mapped_column(Float)
     computed_rating: Mapped[str | None] = mapped_column(String(20))
     last_updated: Mapped[datetime | None] = mapped_column(DateTime)
 
     user_holdings = relationship("UserMFHolding", back_populates="scheme", cascade="all, delete-orphan")
 
 
+class MFNavHistory(Base):
+    """Daily NAVs, range-partitioned by year; ``nav_history.ensure_partitions`` creates the partitions."""
+    __tablename__ = "mf_nav_history"
+    __table_args__ = {"postgresql_partition_by": "RANGE (nav_date)"}
+
+    scheme_id: Mapped[str] = mapped_column(String(36), ForeignKey("mf_schemes.id"), primary_key=True)
+    nav_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    nav: Mapped[float] = mapped_column(Float, nullable=False)
+
+
 class UserMFHolding(Base):
     __tablename__ = "user_mf_holdings"
 
@@ -44,3 +56,53 @@ class UserMFHolding(Base):
 
     user = relationship("User", back_populates="mf_holdings")
     scheme = relationship("MFScheme", back_populates="user_holdings")
+
+
+class MFTransaction(Base):
+    __tablename__ = "mf_transactions"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False, index=True)
+    scheme_id: Mapped[str] = mapped_column(String(36), ForeignKey("mf_schemes.id"), nullable=False)
+    folio: Mapped[str | None] = mapped_column(String(50))
+    trade_date: Mapped[date] = mapped_column(Date, nullable=False)
+    description: Mapped[str] = mapped_column(String(255), nullable=False)
+    amount: Mapped[float] = mapped_column(Float, nullable=False)
+    units: Mapped[float] = mapped_column(Float, nullable=False)
+    nav: Mapped[float] = mapped_column(Float, nullable=False)
+    balance: Mapped[float] = mapped_column(Float, nullable=False)
+    source: Mapped[str] = mapped_column(String(20), default="cas")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class CASUpload(Base):
+    """One uploaded statement and the progress of its background ingestion."""
+    __tablename__ = "cas_uploads"
+    __table_args__ = (UniqueConstraint("user_id", "content_hash", name="uq_cas_uploads_user_content_hash"),)
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    filename: Mapped[str | None] = mapped_column(String(255))
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default="queued")
+    pages_total: Mapped[int | None] = mapped_column(Integer)
+    pages_parsed: Mapped[int] = mapped_column(Integer, default=0)
+    schemes_found: Mapped[int] = mapped_column(Integer, default=0)
+    holdings_saved: Mapped[int] = mapped_column(Integer, default=0)
+    transactions_saved: Mapped[int] = mapped_column(Integer, default=0)
+    unmatched_schemes: Mapped[list] = mapped_column(JSON, default=list)
+    error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    chunks = relationship("CASUploadChunk", cascade="all, delete-orphan")
+
+
+class CASUploadChunk(Base):
+    """The uploaded PDF in fixed-size pieces, so API and worker containers need no shared disk."""
+    __tablename__ = "cas_upload_chunks"
+
+    upload_id: Mapped[str] = mapped_column(String(36), ForeignKey("cas_uploads.id"), primary_key=True)
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, date
-from sqlalchemy import String, Float, Integer, DateTime, Date, ForeignKey
+from sqlalchemy import String, Float, Integer, Boolean, DateTime, Date, ForeignKey, Index, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models import Base
 
@@ -19,3 +19,38 @@ class Holding(Base):
     user = relationship("User", back_populates="holdings")
     stock = relationship("Stock")
     tax_recommendations = relationship("TaxHarvestRecommendation", back_populates="holding", cascade="all, delete-orphan")
+
+
+# Rebuilding a user's stored lot book (portfolio_service._compute) reads their lots in queue order.
+Index("ix_holdings_user_stock_fifo", Holding.user_id, Holding.stock_id, Holding.buy_date, Holding.created_at)
+
+
+class PortfolioValuation(Base):
+    """Materialized portfolio summary per user, kept current by portfolio_service."""
+    __tablename__ = "portfolio_valuations"
+
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), primary_key=True)
+    total_invested: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    current_value: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    realized_gain: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    holdings: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class RealizedGain(Base):
+    """The part of one lot closed by a sale."""
+    __tablename__ = "realized_gains"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False, index=True)
+    stock_id: Mapped[str] = mapped_column(String(36), ForeignKey("stocks.id"), nullable=False)
+    # Not a foreign key: the lot's Holding row is deleted once fully sold.
+    holding_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    buy_price: Mapped[float] = mapped_column(Float, nullable=False)
+    buy_date: Mapped[date] = mapped_column(Date, nullable=False)
+    sell_price: Mapped[float] = mapped_column(Float, nullable=False)
+    sell_date: Mapped[date] = mapped_column(Date, nullable=False)
+    gain: Mapped[float] = mapped_column(Float, nullable=False)
+    is_short_term: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, date
-from sqlalchemy import String, Float, Integer, Text, DateTime, Date, ForeignKey, Table, Column
+from sqlalchemy import String, Float, Integer, Text, DateTime, Date, ForeignKey, Table, Column, UniqueConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models import Base
 
@@ -52,8 +52,17 @@ class Stock(Base):
     peers = relationship("Stock", secondary=stock_peers, primaryjoin=id == stock_peers.c.stock_id, secondaryjoin=id == stock_peers.c.peer_stock_id)
 
 
+# Screener indexes: the default market-cap ordering (with id as the keyset tiebreaker), the same
+# ordering within a sector, and partial indexes for ratio range filters, which never match NULL.
+Index("ix_stocks_market_cap_id", Stock.market_cap.desc().nullslast(), Stock.id.desc())
+Index("ix_stocks_sector_market_cap_id", Stock.sector, Stock.market_cap.desc().nullslast(), Stock.id.desc())
+for _column in (Stock.pe_ratio, Stock.roce, Stock.roe, Stock.debt_to_equity):
+    Index(f"ix_stocks_{_column.key}", _column, postgresql_where=_column.isnot(None))
+
+
 class QuarterlyResult(Base):
     __tablename__ = "quarterly_results"
+    __table_args__ = (UniqueConstraint("stock_id", "quarter", name="uq_quarterly_results_stock_quarter"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     stock_id: Mapped[str] = mapped_column(String(36), ForeignKey("stocks.id"), nullable=False)
@@ -68,6 +77,7 @@ class QuarterlyResult(Base):
 
 class AnnualResult(Base):
     __tablename__ = "annual_results"
+    __table_args__ = (UniqueConstraint("stock_id", "fiscal_year", name="uq_annual_results_stock_fiscal_year"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     stock_id: Mapped[str] = mapped_column(String(36), ForeignKey("stocks.id"), nullable=False)
@@ -83,6 +93,7 @@ class AnnualResult(Base):
 
 class ShareholdingPattern(Base):
     __tablename__ = "shareholding_patterns"
+    __table_args__ = (UniqueConstraint("stock_id", "quarter", name="uq_shareholding_patterns_stock_quarter"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     stock_id: Mapped[str] = mapped_column(String(36), ForeignKey("stocks.id"), nullable=False)
@@ -104,3 +115,15 @@ class PriceHistory(Base):
     close_price: Mapped[float] = mapped_column(Float, nullable=False)
 
     stock = relationship("Stock", back_populates="price_history")
+
+
+class ScrapeState(Base):
+    __tablename__ = "scrape_states"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    symbol: Mapped[str] = mapped_column(String(20), unique=True, index=True, nullable=False)
+    url: Mapped[str | None] = mapped_column(String(255))
+    etag: Mapped[str | None] = mapped_column(String(255))
+    last_modified: Mapped[str | None] = mapped_column(String(64))
+    content_hash: Mapped[str | None] = mapped_column(String(64))
+    changed_at: Mapped[datetime | None] = mapped_column(DateTime)
@@ -13,6 +13,12 @@ class MFSchemeResponse(BaseModel):
     return_1y: float | None = None
     return_3y: float | None = None
     return_5y: float | None = None
+    category_avg_1y: float | None = None
+    category_avg_3y: float | None = None
+    category_avg_5y: float | None = None
+    category_median_expense: float | None = None
+    rolling_1y_avg: float | None = None
+    rolling_1y_min: float | None = None
     computed_rating: str | None = None
 
     model_config = {"from_attributes": True}
@@ -27,6 +33,7 @@ class UserMFHoldingResponse(BaseModel):
     current_value: float | None = None
     pnl: float | None = None
     rating: str | None = None
+    xirr: float | None = None
     source: str
 
     model_config = {"from_attributes": True}
@@ -46,3 +53,20 @@ class MFImportCreate(BaseModel):
     units: float
     avg_nav: float
     invested_amount: float
+
+
+class CASUploadResponse(BaseModel):
+    id: str
+    status: str
+    filename: str | None = None
+    pages_total: int | None = None
+    pages_parsed: int
+    progress: float
+    schemes_found: int
+    holdings_saved: int
+    transactions_saved: int
+    unmatched_schemes: list[str]
+    error: str | None = None
+    deduplicated: bool = False
+    created_at: datetime
+    updated_at: datetime
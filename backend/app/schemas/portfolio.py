@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date, datetime
 
 
@@ -32,4 +32,31 @@ class PortfolioSummary(BaseModel):
     current_value: float
     total_pnl: float
     total_pnl_percent: float
+    realized_pnl: float = 0.0
     holdings: list[HoldingResponse]
+
+
+class SellRequest(BaseModel):
+    stock_id: str
+    quantity: int = Field(gt=0)
+    sell_price: float = Field(gt=0)
+    sell_date: date
+    lot_ids: list[str] | None = Field(None, description="Sell from these lots in this order instead of FIFO")
+
+
+class RealizedGainResponse(BaseModel):
+    holding_id: str
+    quantity: int
+    buy_price: float
+    buy_date: date
+    sell_price: float
+    sell_date: date
+    gain: float
+    is_short_term: bool
+
+    model_config = {"from_attributes": True}
+
+
+class SellResponse(BaseModel):
+    realized_gain: float
+    lots: list[RealizedGainResponse]
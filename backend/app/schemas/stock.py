@@ -71,8 +71,22 @@ class StockDetail(StockListItem):
     peers: list[StockListItem] = []
 
 
+class StockSuggestion(BaseModel):
+    symbol: str
+    name: str
+
+
 class StockListResponse(BaseModel):
     items: list[StockListItem]
-    total: int
+    total: int | None = None
     page: int
     page_size: int
+    next_cursor: str | None = None
+
+
+class ScrapeJobResponse(BaseModel):
+    job_id: str
+    symbol: str
+    status: str
+    error: str | None = None
+    stock: StockDetail | None = None
@@ -24,6 +24,8 @@ class TaxHarvestSummary(BaseModel):
     total_estimated_tax_saving: float
     stcg_harvestable: float
     ltcg_harvestable: float
+    realized_stcg: float = 0.0
+    realized_ltcg: float = 0.0
     recommendations: list[TaxHarvestRecommendationResponse]
 
 
@@ -0,0 +1,264 @@
+"""Daily NAV ingestion from AMFI's NAVAll.txt, and NAV history backfill.
+
+The file is a flat, semicolon separated listing of every open scheme, grouped
+under scheme-type and fund-house header lines::
+
+    Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date
+
+    Open Ended Schemes(Equity Scheme - Large Cap Fund)
+
+    Axis Mutual Fund
+
+    120465;INF846K01EW2;-;Axis Bluechip Fund - Direct Plan - Growth;58.1200;16-Oct-2026
+
+AMFI's historical NAV report uses the same layout with its columns in another
+order, which the parser picks up from the header line. Lines are parsed as
+they arrive and upserted in batches, so neither the file nor the parsed
+schemes are ever held in memory as a whole.
+"""
+import logging
+import time
+from collections.abc import AsyncIterator, Iterable, Iterator
+from datetime import date, datetime
+import aiofiles
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import metrics
+from app.config import settings
+from app.models.mutual_fund import MFScheme
+from app.services import nav_history
+from app.services.scraper.http_client import get_client
+
+logger = logging.getLogger(__name__)
+
+HEADER_PREFIX = "Scheme Code;"
+FILE_BLOCK_BYTES = 1 << 16
+NAVALL_COLUMNS = {"amfi_code": 0, "isin_growth": 1, "isin_reinvest": 2, "scheme_name": 3, "nav": 4, "date": 5}
+COLUMN_PREFIXES = {
+    "amfi_code": "scheme code",
+    "isin_growth": "isin div payout",
+    "isin_reinvest": "isin div reinvestment",
+    "scheme_name": "scheme name",
+    "nav": "net asset value",
+    "date": "date",
+}
+
+
+class NavLineParser:
+    """Turns NAVAll.txt lines into ``mf_schemes`` rows, tracking the current category and fund house."""
+
+    def __init__(self):
+        self.category: str | None = None
+        self.sub_category: str | None = None
+        self.fund_house: str | None = None
+        self.skipped = 0
+        self.columns = NAVALL_COLUMNS
+        self._width = max(NAVALL_COLUMNS.values()) + 1
+        self._dates: dict[str, datetime] = {}
+
+    def _date(self, text: str) -> datetime | None:
+        # Nearly every row carries the same date, so each distinct string is parsed once.
+        parsed = self._dates.get(text)
+        if parsed is None:
+            try:
+                parsed = self._dates[text] = datetime.strptime(text, "%d-%b-%Y")
+            except ValueError:
+                return None
+        return parsed
+
+    def parse(self, line: str) -> dict | None:
+        line = line.strip()
+        if not line:
+            return None
+        if line.startswith(HEADER_PREFIX):
+            self._columns(line)
+            return None
+        if ";" not in line:
+            self._header(line)
+            return None
+
+        fields = line.split(";")
+        if len(fields) < self._width or not fields[0].isdigit():
+            self.skipped += 1
+            return None
+        col = self.columns
+        try:
+            nav_value = float(fields[col["nav"]])
+        except ValueError:  # "N.A." for schemes without a NAV on the day
+            nav_value = None
+        isins = (fields[col["isin_growth"]].strip(), fields[col["isin_reinvest"]].strip())
+        return {
+            "amfi_code": fields[col["amfi_code"]],
+            "scheme_name": fields[col["scheme_name"]].strip(),
+            "isin": next((i for i in isins if len(i) == 12), None),
+            "category": self.category,
+            "sub_category": self.sub_category,
+            "fund_house": self.fund_house,
+            "nav": nav_value,
+            "last_updated": self._date(fields[col["date"]].strip()),
+        }
+
+    def _columns(self, header: str):
+        # NAVAll.txt and the historical NAV report order their columns differently.
+        names = [name.strip().lower() for name in header.split(";")]
+        found = {}
+        for key, prefix in COLUMN_PREFIXES.items():
+            position = next((i for i, name in enumerate(names) if name.startswith(prefix)), None)
+            if position is None:
+                return
+            found[key] = position
+        self.columns = found
+        self._width = max(found.values()) + 1
+
+    def _header(self, line: str):
+        # "Open Ended Schemes(Equity Scheme - Large Cap Fund)" starts a category; anything else is a fund house.
+        if line.endswith(")") and "(" in line:
+            inner = line[line.index("(") + 1:-1]
+            category, _, sub_category = inner.partition(" - ")
+            self.category = category.strip() or None
+            self.sub_category = sub_category.strip() or None
+        else:
+            self.fund_house = line
+
+
+def parse_lines(lines: Iterable[str], parser: NavLineParser | None = None) -> Iterator[dict]:
+    parser = parser or NavLineParser()
+    for line in lines:
+        if (row := parser.parse(line)) is not None:
+            yield row
+
+
+async def _file_lines(path: str) -> AsyncIterator[str]:
+    # Read in blocks: iterating aiofiles line by line costs a thread hop per line.
+    async with aiofiles.open(path, "rb") as f:
+        tail = b""
+        while block := await f.read(FILE_BLOCK_BYTES):
+            lines = (tail + block).split(b"\n")
+            tail = lines.pop()
+            for line in lines:
+                yield line.decode("utf-8", "replace")
+        if tail:
+            yield tail.decode("utf-8", "replace")
+
+
+async def _http_lines(url: str) -> AsyncIterator[str]:
+    async with get_client().stream("GET", url) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            yield line
+
+
+def source_lines(source: str) -> AsyncIterator[str]:
+    """Lines of an http(s) URL or a local NAVAll.txt."""
+    if source.startswith(("http://", "https://")):
+        return _http_lines(source)
+    return _file_lines(source)
+
+
+def upsert_statement():
+    stmt = pg_insert(MFScheme)
+    new = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[MFScheme.amfi_code],
+        set_={
+            "scheme_name": new.scheme_name,
+            "isin": func.coalesce(new.isin, MFScheme.isin),
+            "category": new.category,
+            "sub_category": new.sub_category,
+            "fund_house": new.fund_house,
+            # A scheme reported as N.A. keeps its last known NAV.
+            "nav": func.coalesce(new.nav, MFScheme.nav),
+            "last_updated": func.coalesce(new.last_updated, MFScheme.last_updated),
+        },
+        # Rows that would not change are left alone, so re-running a day's file writes nothing.
+        where=or_(
+            new.nav.isnot(None) & MFScheme.nav.is_distinct_from(new.nav),
+            new.last_updated.isnot(None) & MFScheme.last_updated.is_distinct_from(new.last_updated),
+            new.isin.isnot(None) & MFScheme.isin.is_distinct_from(new.isin),
+            MFScheme.scheme_name != new.scheme_name,
+            MFScheme.category.is_distinct_from(new.category),
+            MFScheme.sub_category.is_distinct_from(new.sub_category),
+            MFScheme.fund_house.is_distinct_from(new.fund_house),
+        ),
+    )
+
+
+async def _flush(db: AsyncSession, batch: dict[str, dict]):
+    with metrics.timed("amfi_nav.upsert_batch"):
+        await db.execute(upsert_statement(), list(batch.values()))
+        # The day's NAVs also go into the history the return calculations read.
+        await nav_history.ensure_partitions(db, {r["last_updated"].year for r in batch.values() if r["last_updated"]})
+        await db.execute(nav_history.record_latest(list(batch)))
+        await db.commit()
+
+
+async def ingest_nav(db: AsyncSession, source: str | None = None, batch_size: int | None = None) -> dict:
+    """Stream NAVAll.txt from ``source`` (a URL or local path) into ``mf_schemes``."""
+    source = source or settings.amfi_nav_url
+    batch_size = batch_size or settings.amfi_nav_batch_size
+    started = time.perf_counter()
+    parser = NavLineParser()
+    # Keyed by code: a code repeated within one batch would make ON CONFLICT DO UPDATE fail.
+    batch: dict[str, dict] = {}
+    parsed = batches = 0
+
+    async for line in source_lines(source):
+        row = parser.parse(line)
+        if row is None:
+            continue
+        parsed += 1
+        batch[row["amfi_code"]] = row
+        if len(batch) >= batch_size:
+            await _flush(db, batch)
+            batches += 1
+            batch = {}
+    if batch:
+        await _flush(db, batch)
+        batches += 1
+
+    elapsed = time.perf_counter() - started
+    metrics.observe("amfi_nav.ingest", elapsed)
+    summary = {"schemes": parsed, "batches": batches, "skipped_lines": parser.skipped, "seconds": round(elapsed, 2)}
+    logger.info("AMFI NAV ingest from %s: %s", source, summary)
+    return summary
+
+
+async def _flush_history(db: AsyncSession, batch: dict[tuple[str, date], float]):
+    with metrics.timed("amfi_nav.history_batch"):
+        await nav_history.ensure_partitions(db, {day.year for _, day in batch})
+        await db.execute(nav_history.upsert_statement(), [
+            {"scheme_id": scheme_id, "nav_date": day, "nav": nav} for (scheme_id, day), nav in batch.items()
+        ])
+        await db.commit()
+
+
+async def backfill_history(db: AsyncSession, source: str, batch_size: int | None = None) -> dict:
+    """Load a historical NAV report (URL or local path) into ``mf_nav_history`` for schemes already known."""
+    batch_size = batch_size or settings.amfi_nav_batch_size
+    started = time.perf_counter()
+    scheme_ids = dict((await db.execute(select(MFScheme.amfi_code, MFScheme.id))).all())
+    parser = NavLineParser()
+    batch: dict[tuple[str, date], float] = {}
+    unknown: set[str] = set()
+    navs = 0
+
+    async for line in source_lines(source):
+        row = parser.parse(line)
+        if row is None or row["nav"] is None or row["last_updated"] is None:
+            continue
+        scheme_id = scheme_ids.get(row["amfi_code"])
+        if scheme_id is None:
+            unknown.add(row["amfi_code"])
+            continue
+        navs += 1
+        batch[(scheme_id, row["last_updated"].date())] = row["nav"]
+        if len(batch) >= batch_size:
+            await _flush_history(db, batch)
+            batch = {}
+    if batch:
+        await _flush_history(db, batch)
+
+    summary = {"navs": navs, "unknown_schemes": len(unknown), "seconds": round(time.perf_counter() - started, 2)}
+    logger.info("AMFI NAV history backfill from %s: %s", source, summary)
+    return summary
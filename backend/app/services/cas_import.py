@@ -0,0 +1,285 @@
+import base64
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta
+import aiofiles
+from cryptography.fernet import Fernet, InvalidToken
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import metrics
+from app.config import settings
+from app.database import async_session
+from app.models.mutual_fund import CASUpload, CASUploadChunk, MFScheme, MFTransaction, UserMFHolding
+from app.schemas.mutual_fund import CASUploadResponse
+from app.services import nav_returns
+from app.services.cas_parser import OPENING_BALANCE, CASParseError, CASScheme, StatementParser, iter_page_lines, open_pdf
+from app.tasks.celery_app import celery
+
+logger = logging.getLogger(__name__)
+
+CHUNK_BYTES = 1 << 20
+PROGRESS_EVERY_PAGES = 10
+# Share of overall progress at the start of each stage; parsing fills the gap up to matching page by page.
+STAGE_PROGRESS = {"queued": 0.0, "parsing": 0.05, "matching": 0.85, "saving": 0.9, "done": 1.0}
+
+
+async def resolve_schemes(db: AsyncSession, schemes: list[CASScheme]) -> dict[str, str]:
+    """Map statement ISINs to MFScheme ids, by ISIN and then by exact (case-insensitive) name."""
+    isins = {s.isin for s in schemes}
+    result = await db.execute(select(MFScheme.isin, MFScheme.id).where(MFScheme.isin.in_(isins)))
+    resolved = dict(result.all())
+
+    names = {s.name.lower(): s.isin for s in schemes if s.isin not in resolved}
+    if names:
+        result = await db.execute(
+            select(func.lower(MFScheme.scheme_name), MFScheme.id).where(func.lower(MFScheme.scheme_name).in_(names))
+        )
+        resolved.update({names[name]: scheme_id for name, scheme_id in result.all()})
+    return resolved
+
+
+async def save_statement(
+    db: AsyncSession, user_id: str, schemes: list[CASScheme], resolved: dict[str, str] | None = None,
+) -> dict:
+    """Replace the user's CAS-sourced holdings and transactions for the schemes in the statement."""
+    if resolved is None:
+        resolved = await resolve_schemes(db, schemes)
+    matched = [s for s in schemes if s.isin in resolved]
+    scheme_ids = list({resolved[s.isin] for s in matched})
+
+    # Re-importing a statement must not double count, so earlier CAS rows for these schemes are replaced.
+    await db.execute(delete(UserMFHolding).where(
+        UserMFHolding.user_id == user_id, UserMFHolding.source == "cas", UserMFHolding.scheme_id.in_(scheme_ids),
+    ))
+    await db.execute(delete(MFTransaction).where(
+        MFTransaction.user_id == user_id, MFTransaction.source == "cas", MFTransaction.scheme_id.in_(scheme_ids),
+    ))
+
+    holdings = [
+        {
+            "user_id": user_id, "scheme_id": resolved[s.isin], "units": s.units,
+            "avg_nav": s.avg_nav, "invested_amount": s.invested, "source": "cas",
+        }
+        for s in matched if s.units > 0
+    ]
+    transactions = [
+        {"user_id": user_id, "scheme_id": resolved[s.isin], "folio": s.folio, "source": "cas", **asdict(t)}
+        for s in matched for t in s.transactions
+    ]
+    # Units held before the statement period; without them returns would count the current value with no cost.
+    # They are valued at the period start's NAV here, so computing returns later needs no NAV lookups; a day the
+    # NAV history does not cover yet is stored with nav 0 and valued when returns are computed.
+    opening = [s for s in matched if s.opening_units > 0 and s.opening_date is not None]
+    navs = await nav_returns.navs_on(db, ((resolved[s.isin], s.opening_date) for s in opening))
+    for s in opening:
+        nav = navs.get((resolved[s.isin], s.opening_date), 0.0)
+        transactions.append({
+            "user_id": user_id, "scheme_id": resolved[s.isin], "folio": s.folio, "source": "cas",
+            "trade_date": s.opening_date, "description": OPENING_BALANCE,
+            "amount": round(s.opening_units * nav, 2), "units": s.opening_units, "nav": nav, "balance": s.opening_units,
+        })
+    if holdings:
+        await db.execute(insert(UserMFHolding), holdings)
+    if transactions:
+        await db.execute(insert(MFTransaction), transactions)
+    await db.commit()
+
+    unmatched = [s.name for s in schemes if s.isin not in resolved]
+    if unmatched:
+        logger.info("CAS import for %s: %d schemes not in mf_schemes", user_id, len(unmatched))
+    return {"holdings": len(holdings), "transactions": len(transactions), "unmatched_schemes": unmatched}
+
+
+def upload_response(upload: CASUpload, deduplicated: bool = False) -> CASUploadResponse:
+    progress = STAGE_PROGRESS.get(upload.status, 0.0)
+    if upload.status == "parsing" and upload.pages_total:
+        progress += (STAGE_PROGRESS["matching"] - progress) * upload.pages_parsed / upload.pages_total
+    return CASUploadResponse(
+        id=upload.id,
+        status=upload.status,
+        filename=upload.filename,
+        pages_total=upload.pages_total,
+        pages_parsed=upload.pages_parsed,
+        progress=round(progress, 3),
+        schemes_found=upload.schemes_found,
+        holdings_saved=upload.holdings_saved,
+        transactions_saved=upload.transactions_saved,
+        unmatched_schemes=upload.unmatched_schemes or [],
+        error=upload.error,
+        deduplicated=deduplicated,
+        created_at=upload.created_at,
+        updated_at=upload.updated_at,
+    )
+
+
+async def get_upload(db: AsyncSession, user_id: str, upload_id: str) -> CASUpload | None:
+    result = await db.execute(select(CASUpload).where(CASUpload.id == upload_id, CASUpload.user_id == user_id))
+    return result.scalar_one_or_none()
+
+
+async def _store_chunks(db: AsyncSession, upload_id: str, path: str):
+    async with aiofiles.open(path, "rb") as f:
+        seq = 0
+        while data := await f.read(CHUNK_BYTES):
+            # Core inserts, so chunks don't pile up in the session's identity map.
+            await db.execute(insert(CASUploadChunk).values(upload_id=upload_id, seq=seq, data=data))
+            seq += 1
+
+
+def _retryable(upload: CASUpload) -> bool:
+    if upload.status == "failed":
+        return True
+    # A queued or in-progress upload that stopped reporting was lost with its worker or its task message.
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.cas_ingest_stale_seconds)
+    return upload.status != "done" and upload.updated_at < stale_before
+
+
+async def create_upload(
+    db: AsyncSession, user_id: str, path: str, content_hash: str, size_bytes: int, filename: str | None,
+) -> tuple[CASUpload, bool]:
+    """Store the statement and return ``(upload, created)``.
+
+    A statement the user already uploaded (same content hash) is not stored
+    or processed again unless its last attempt failed or stalled.
+    """
+    query = select(CASUpload).where(CASUpload.user_id == user_id, CASUpload.content_hash == content_hash)
+    upload = (await db.execute(query.with_for_update())).scalar_one_or_none()
+    if upload is not None and not _retryable(upload):
+        metrics.incr("cas.upload.deduplicated")
+        return upload, False
+
+    if upload is None:
+        upload = CASUpload(user_id=user_id, content_hash=content_hash, size_bytes=size_bytes, filename=filename)
+        db.add(upload)
+    else:
+        await db.execute(delete(CASUploadChunk).where(CASUploadChunk.upload_id == upload.id))
+        upload.filename = filename
+        upload.error = None
+        upload.pages_parsed = 0
+        upload.updated_at = datetime.utcnow()
+    upload.status = "queued"
+    try:
+        await db.flush()
+        await _store_chunks(db, upload.id, path)
+        await db.commit()
+    except IntegrityError:
+        # The same statement uploaded twice at once; the other request owns the processing.
+        await db.rollback()
+        return (await db.execute(query)).scalar_one(), False
+    await db.refresh(upload)
+    return upload, True
+
+
+def _fernet() -> Fernet:
+    return Fernet(base64.urlsafe_b64encode(hashlib.sha256(settings.secret_key.encode()).digest()))
+
+
+def seal_password(password: str | None) -> str | None:
+    return _fernet().encrypt(password.encode()).decode() if password else None
+
+
+def open_password(sealed: str | None) -> str | None:
+    if not sealed:
+        return None
+    try:
+        return _fernet().decrypt(sealed.encode(), ttl=settings.cas_ingest_stale_seconds).decode()
+    except InvalidToken:
+        raise CASParseError("The statement password has expired; please upload the statement again") from None
+
+
+async def enqueue_ingest(upload_id: str, password: str | None):
+    # The password is never written to the database; it sits in the broker message encrypted with secret_key.
+    try:
+        celery.send_task(
+            "app.tasks.cas_ingest.ingest_cas", args=[upload_id], kwargs={"sealed_password": seal_password(password)},
+        )
+    except Exception:
+        # Otherwise the upload would sit in "queued" and deduplication would keep returning it.
+        await fail_upload(upload_id, "Could not queue the import; please upload again")
+        raise
+
+
+async def update_upload(upload_id: str, **fields):
+    # A session of its own, so progress is visible to the status endpoint as soon as it is written.
+    async with async_session() as db:
+        await db.execute(update(CASUpload).where(CASUpload.id == upload_id).values(**fields))
+        await db.commit()
+
+
+async def fail_upload(upload_id: str, error: str):
+    # A failed upload is only retried by uploading the file again (the password is not kept), so its chunks go now.
+    async with async_session() as db:
+        await db.execute(update(CASUpload).where(CASUpload.id == upload_id).values(status="failed", error=error))
+        await db.execute(delete(CASUploadChunk).where(CASUploadChunk.upload_id == upload_id))
+        await db.commit()
+
+
+async def _restore_file(upload_id: str, path: str):
+    async with async_session() as db, aiofiles.open(path, "wb") as f:
+        chunks = await db.stream_scalars(
+            select(CASUploadChunk.data).where(CASUploadChunk.upload_id == upload_id).order_by(CASUploadChunk.seq)
+        )
+        async for data in chunks:
+            await f.write(data)
+
+
+async def _parse_with_progress(upload_id: str, path: str, password: str | None) -> list[CASScheme]:
+    parser = StatementParser()
+    with open_pdf(path, password) as pdf:
+        total = len(pdf.pages)
+        await update_upload(upload_id, status="parsing", pages_total=total, pages_parsed=0)
+        for number, lines in enumerate(iter_page_lines(pdf), 1):
+            parser.feed(lines)
+            if number % PROGRESS_EVERY_PAGES == 0 or number == total:
+                await update_upload(upload_id, pages_parsed=number, schemes_found=len(parser.schemes))
+    return parser.finish()
+
+
+async def ingest(upload_id: str, sealed_password: str | None = None):
+    """Restore, parse, match and save one upload, recording each stage on its CASUpload row."""
+    started = time.perf_counter()
+    async with async_session() as db:
+        upload = await db.get(CASUpload, upload_id)
+        if upload is None or upload.status == "done":
+            return
+        user_id = upload.user_id
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        password = open_password(sealed_password)
+        await _restore_file(upload_id, path)
+        with metrics.timed("cas.ingest.parse"):
+            schemes = await _parse_with_progress(upload_id, path, password)
+
+        await update_upload(upload_id, status="matching", schemes_found=len(schemes))
+        async with async_session() as db:
+            resolved = await resolve_schemes(db, schemes)
+            await update_upload(upload_id, status="saving")
+            summary = await save_statement(db, user_id, schemes, resolved)
+    except Exception as e:
+        message = str(e) if isinstance(e, CASParseError) else f"Ingestion failed: {type(e).__name__}"
+        await fail_upload(upload_id, message)
+        if not isinstance(e, CASParseError):
+            raise
+        return
+    finally:
+        os.unlink(path)
+
+    await update_upload(
+        upload_id,
+        status="done",
+        holdings_saved=summary["holdings"],
+        transactions_saved=summary["transactions"],
+        unmatched_schemes=summary["unmatched_schemes"],
+    )
+    # The hash row stays behind for deduplication; the file itself is no longer needed.
+    async with async_session() as db:
+        await db.execute(delete(CASUploadChunk).where(CASUploadChunk.upload_id == upload_id))
+        await db.commit()
+    logger.info("CAS upload %s ingested in %.1fs: %s", upload_id, time.perf_counter() - started, summary)
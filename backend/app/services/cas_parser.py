@@ -0,0 +1,161 @@
+"""Parser for CAMS/KFintech Consolidated Account Statements (CAS).
+
+Reads the PDF a page at a time and releases each page once its text is
+extracted, so memory stays flat for statements running to hundreds of pages.
+Kept free of database imports: ``parse_cas`` runs in the cpu pool's worker
+processes.
+"""
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import date, datetime
+import pdfplumber
+
+NUMBER = r"\(?-?[\d,]+\.\d+\)?"
+
+FOLIO_RE = re.compile(r"Folio No\s*:\s*([\w/ ]+?)(?:\s{2,}|\s+PAN|$)", re.I)
+ISIN_RE = re.compile(r"ISIN\s*:\s*(INF[A-Z0-9]{9})", re.I)
+SCHEME_RE = re.compile(r"^(?:[A-Z0-9]+-)?(.+?)\s*-\s*ISIN\s*:", re.I)
+TRANSACTION_RE = re.compile(
+    rf"^(\d{{2}}-[A-Za-z]{{3}}-\d{{4}})\s+(.+?)\s+({NUMBER})\s+({NUMBER})\s+({NUMBER})\s+({NUMBER})$"
+)
+OPENING_RE = re.compile(rf"Opening Unit Balance\s*:\s*({NUMBER})", re.I)
+PERIOD_RE = re.compile(r"(\d{2}-[A-Za-z]{3}-\d{4})\s+To\s+(\d{2}-[A-Za-z]{3}-\d{4})", re.I)
+CLOSING_RE = re.compile(rf"Closing Unit Balance\s*:\s*({NUMBER})", re.I)
+NAV_RE = re.compile(rf"NAV on [\w-]+\s*:\s*INR\s*({NUMBER})", re.I)
+COST_RE = re.compile(rf"(?:Total )?Cost Value\s*:\s*({NUMBER})", re.I)
+
+
+# Description of the transaction row that carries a scheme's opening unit balance.
+OPENING_BALANCE = "Opening Unit Balance"
+
+
+class CASParseError(ValueError):
+    pass
+
+
+@dataclass
+class CASTransaction:
+    trade_date: date
+    description: str
+    amount: float
+    units: float
+    nav: float
+    balance: float
+
+
+@dataclass
+class CASScheme:
+    isin: str
+    name: str
+    folio: str | None = None
+    units: float = 0.0
+    opening_units: float = 0.0
+    nav: float | None = None
+    cost_value: float | None = None
+    period_start: date | None = None
+    transactions: list[CASTransaction] = field(default_factory=list)
+
+    @property
+    def opening_date(self) -> date | None:
+        """When ``opening_units`` were held: the statement period's start, else the first transaction."""
+        return self.period_start or min((t.trade_date for t in self.transactions), default=None)
+
+    @property
+    def invested(self) -> float:
+        if self.cost_value is not None:
+            return self.cost_value
+        return sum(t.amount for t in self.transactions if t.units > 0)
+
+    @property
+    def avg_nav(self) -> float:
+        return self.invested / self.units if self.units else 0.0
+
+
+def _number(text: str) -> float:
+    negative = text.startswith("(") or text.startswith("-")
+    value = float(text.strip("()-").replace(",", ""))
+    return -value if negative else value
+
+
+def _date(text: str) -> date:
+    return datetime.strptime(text, "%d-%b-%Y").date()
+
+
+def open_pdf(path: str, password: str | None = None) -> pdfplumber.PDF:
+    try:
+        return pdfplumber.open(path, password=password or "")
+    except Exception as e:
+        # pdfminer reports a wrong password and a corrupt file with its own exception types.
+        raise CASParseError(f"Could not open CAS PDF: {type(e).__name__}") from None
+
+
+def iter_page_lines(pdf: pdfplumber.PDF) -> Iterator[list[str]]:
+    for page in pdf.pages:
+        text = page.extract_text() or ""
+        page.close()
+        yield [line.strip() for line in text.splitlines() if line.strip()]
+
+
+class StatementParser:
+    """Line-at-a-time CAS parser; feed it pages in order and call ``finish``."""
+
+    def __init__(self):
+        self.schemes: list[CASScheme] = []
+        self.period_start: date | None = None
+        self._folio: str | None = None
+        self._current: CASScheme | None = None
+
+    def feed(self, lines: list[str]):
+        for line in lines:
+            self._feed_line(line)
+
+    def _feed_line(self, line: str):
+        if self.period_start is None and (m := PERIOD_RE.search(line)):
+            self.period_start = _date(m.group(1))
+        if m := FOLIO_RE.search(line):
+            self._folio = m.group(1).strip()
+        if m := ISIN_RE.search(line):
+            name = SCHEME_RE.match(line)
+            self._current = CASScheme(
+                isin=m.group(1).upper(), name=name.group(1).strip() if name else line, folio=self._folio,
+            )
+            self.schemes.append(self._current)
+            return
+        current = self._current
+        if current is None:
+            return
+        if m := TRANSACTION_RE.match(line):
+            day, description, amount, units, nav, balance = m.groups()
+            current.transactions.append(CASTransaction(
+                trade_date=_date(day),
+                description=description.strip(),
+                amount=_number(amount),
+                units=_number(units),
+                nav=_number(nav),
+                balance=_number(balance),
+            ))
+            return
+        if m := OPENING_RE.search(line):
+            current.opening_units = _number(m.group(1))
+        if m := CLOSING_RE.search(line):
+            current.units = _number(m.group(1))
+        if m := NAV_RE.search(line):
+            current.nav = _number(m.group(1))
+        if m := COST_RE.search(line):
+            current.cost_value = _number(m.group(1))
+
+    def finish(self) -> list[CASScheme]:
+        if not self.schemes:
+            raise CASParseError("No mutual fund schemes found; is this a CAMS/KFintech consolidated statement?")
+        for scheme in self.schemes:
+            scheme.period_start = self.period_start
+        return self.schemes
+
+
+def parse_cas(path: str, password: str | None = None) -> list[CASScheme]:
+    parser = StatementParser()
+    with open_pdf(path, password) as pdf:
+        for lines in iter_page_lines(pdf):
+            parser.feed(lines)
+    return parser.finish()
@@ -0,0 +1,96 @@
+from dataclasses import dataclass, field
+from datetime import date
+import numpy as np
+
+
+def long_term_cutoff(on: date) -> date:
+    """Lots bought after this date are short-term on ``on``: listed equity turns long-term after 12 months."""
+    try:
+        return on.replace(year=on.year - 1)
+    except ValueError:  # 29 February
+        return on.replace(year=on.year - 1, day=28)
+
+
+def is_short_term(buy_date: np.ndarray, on: date) -> np.ndarray:
+    return buy_date > np.datetime64(long_term_cutoff(on))
+
+
+def queue_key(entry: dict) -> tuple:
+    """Sort key that puts stored lot entries in queue order: by stock, then FIFO."""
+    return entry["stock_id"], entry["buy_date"], entry.get("created_at") or "", entry["id"]
+
+
+@dataclass
+class LotBook:
+    """A user's open lots as parallel arrays.
+
+    Rows are grouped by stock and FIFO-ordered (buy date, then entry time)
+    within each group, so every stock's lot queue is a contiguous slice.
+    ``current_price`` is NaN where the stock has no price.
+    """
+    holding_id: np.ndarray
+    stock_id: np.ndarray
+    quantity: np.ndarray
+    buy_price: np.ndarray
+    buy_date: np.ndarray
+    current_price: np.ndarray
+    _queues: dict[str, slice] = field(init=False, default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        if len(self.stock_id):
+            starts = np.flatnonzero(np.r_[True, self.stock_id[1:] != self.stock_id[:-1]])
+            ends = np.r_[starts[1:], len(self.stock_id)]
+            self._queues = {self.stock_id[s]: slice(s, e) for s, e in zip(starts, ends)}
+
+    def __len__(self) -> int:
+        return len(self.holding_id)
+
+    @classmethod
+    def from_rows(cls, rows) -> "LotBook":
+        holding_id, stock_id, quantity, buy_price, buy_date, current_price = zip(*rows) if rows else ((),) * 6
+        return cls(
+            holding_id=np.array(holding_id, dtype=object),
+            stock_id=np.array(stock_id, dtype=object),
+            quantity=np.array(quantity, dtype=np.int64),
+            buy_price=np.array(buy_price, dtype=np.float64),
+            buy_date=np.array(buy_date, dtype="datetime64[D]"),
+            current_price=np.array(current_price, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_entries(cls, entries: list[dict]) -> "LotBook":
+        """A book over ``PortfolioValuation.holdings`` entries (see ``portfolio_service``)."""
+        # The stored entries are kept in queue order, which makes this sort a single linear pass.
+        entries = sorted(entries, key=queue_key)
+        return cls.from_rows([
+            (e["id"], e["stock_id"], e["quantity"], e["buy_price"], e["buy_date"], e["current_price"]) for e in entries
+        ])
+
+    def queue(self, stock_id: str) -> slice:
+        return self._queues.get(stock_id, slice(0, 0))
+
+    def unrealized_gain(self) -> np.ndarray:
+        """Per-lot unrealized gain; NaN for unpriced lots."""
+        return self.quantity * (self.current_price - self.buy_price)
+
+    def allocate(self, stock_id: str, quantity: int, lot_ids: list[str] | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Rows to sell ``quantity`` of ``stock_id`` from and how many units each gives up.
+
+        Lots are consumed oldest first, or in the order of ``lot_ids`` when the
+        caller picks specific lots.
+        """
+        rows = np.arange(len(self))[self.queue(stock_id)]
+        if lot_ids is not None:
+            position = {h: r for r, h in zip(rows, self.holding_id[rows])}
+            missing = [h for h in lot_ids if h not in position]
+            if missing:
+                raise ValueError(f"Lots not held for this stock: {', '.join(missing)}")
+            rows = np.array([position[h] for h in dict.fromkeys(lot_ids)], dtype=np.int64)
+
+        available = self.quantity[rows]
+        if quantity > available.sum():
+            raise ValueError(f"Cannot sell {quantity} units; only {available.sum()} held in the selected lots")
+        consumed_before = np.cumsum(available) - available
+        take = np.clip(quantity - consumed_before, 0, available)
+        used = take > 0
+        return rows[used], take[used]
@@ -0,0 +1,58 @@
+"""Shared executor for CPU-bound work (HTML parsing, hashing) so it never runs on the event loop."""
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_executor: Executor | None = None
+_slots: asyncio.Semaphore | None = None
+
+
+def start_pool(kind: str | None = None, workers: int | None = None, max_pending: int | None = None):
+    global _executor, _slots
+    if _executor is not None:
+        return
+    kind = kind or settings.cpu_pool_kind
+    workers = workers or settings.cpu_pool_workers
+    if kind == "process":
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        # Spawn the workers now rather than on the first request's event-loop turn.
+        for _ in range(workers):
+            _executor.submit(int)
+    elif kind == "thread":
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cpu-pool")
+    else:
+        raise ValueError(f"Unknown cpu pool kind: {kind!r}")
+    _slots = asyncio.Semaphore(max_pending or settings.cpu_pool_max_pending)
+    logger.info("Started %s cpu pool with %d workers", kind, workers)
+
+
+def shutdown_pool():
+    global _executor, _slots
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    _slots = None
+
+
+async def run_cpu_bound(fn, *args):
+    """Run ``fn(*args)`` in the pool, waiting for a free slot once ``cpu_pool_max_pending`` jobs are queued.
+
+    ``fn`` and its arguments must be picklable when the pool is process-based.
+    """
+    if _executor is None:
+        start_pool()
+    queued = time.perf_counter()
+    async with _slots:
+        started = time.perf_counter()
+        metrics.observe("cpu_pool.wait", started - queued)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_executor, partial(fn, *args))
+        finally:
+            metrics.observe("cpu_pool.run", time.perf_counter() - started)
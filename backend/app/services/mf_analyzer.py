@@ -0,0 +1,182 @@
+"""Category statistics and peer ratings for every mutual fund scheme.
+
+Schemes are compared within their peer group (category and sub-category).
+Everything is computed with NumPy group-bys over the whole ``mf_schemes``
+table and written back to it, so request-time analysis only reads columns.
+"""
+import logging
+import time
+from dataclasses import dataclass
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import metrics
+from app.models.mutual_fund import MFScheme
+
+logger = logging.getLogger(__name__)
+
+# Longer track records count for more; a cheaper fund scores higher on expense.
+SCORE_WEIGHTS = np.array([0.2, 0.3, 0.3, 0.2])
+RATING_BANDS = ((0.8, "Excellent"), (0.6, "Good"), (0.4, "Average"), (0.2, "Below Average"), (0.0, "Poor"))
+MIN_PEERS = 3
+
+
+@dataclass
+class SchemeTable:
+    id: np.ndarray
+    group: np.ndarray
+    returns: np.ndarray
+    expense: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    @property
+    def n_groups(self) -> int:
+        # At least one, so empty tables and tables without categories still index cleanly.
+        return max(int(self.group.max()) + 1, 1) if len(self) else 1
+
+    @classmethod
+    def from_rows(cls, rows) -> "SchemeTable":
+        ids, category, sub_category, r1, r3, r5, expense = zip(*rows) if rows else ((),) * 7
+        keys = np.array([f"{c}\x1f{s or ''}" if c else "" for c, s in zip(category, sub_category)], dtype=object)
+        codes, group = np.unique(keys, return_inverse=True)
+        # Schemes without a category have no peers.
+        if len(codes) and codes[0] == "":
+            group = group - 1
+        return cls(
+            id=np.array(ids, dtype=object),
+            group=group.astype(np.int64),
+            returns=np.array([r1, r3, r5], dtype=np.float64).T.reshape(-1, 3),
+            expense=np.array(expense, dtype=np.float64),
+        )
+
+
+def _grouped(values: np.ndarray, group: np.ndarray, n_groups: int):
+    """Rows with a value and a group, sorted by (group, value), plus per-group counts and start offsets."""
+    rows = np.flatnonzero(np.isfinite(values) & (group >= 0))
+    rows = rows[np.lexsort((values[rows], group[rows]))]
+    counts = np.bincount(group[rows], minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    return rows, counts, starts
+
+
+def group_mean(values: np.ndarray, group: np.ndarray, n_groups: int) -> np.ndarray:
+    ok = np.isfinite(values) & (group >= 0)
+    counts = np.bincount(group[ok], minlength=n_groups)
+    sums = np.bincount(group[ok], weights=values[ok], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def group_median(values: np.ndarray, group: np.ndarray, n_groups: int) -> np.ndarray:
+    rows, counts, starts = _grouped(values, group, n_groups)
+    ordered = values[rows]
+    median = np.full(n_groups, np.nan)
+    has = counts > 0
+    lower = starts[has] + (counts[has] - 1) // 2
+    upper = starts[has] + counts[has] // 2
+    median[has] = (ordered[lower] + ordered[upper]) / 2
+    return median
+
+
+def group_percentile(values: np.ndarray, group: np.ndarray, n_groups: int) -> np.ndarray:
+    """Each row's rank within its group scaled to 0..1 (ties share their average rank); NaN without a value."""
+    rows, counts, starts = _grouped(values, group, n_groups)
+    pct = np.full(len(values), np.nan)
+    if not len(rows):
+        return pct
+    g = group[rows]
+    ordered = values[rows]
+    rank = np.arange(len(rows)) - starts[g]
+    # Runs of equal values within a group get the mean of their ranks.
+    new_run = np.r_[True, (ordered[1:] != ordered[:-1]) | (g[1:] != g[:-1])]
+    run = np.cumsum(new_run) - 1
+    rank = (np.bincount(run, weights=rank) / np.bincount(run))[run]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct[rows] = np.where(counts[g] > 1, rank / (counts[g] - 1), 0.5)
+    return pct
+
+
+@dataclass
+class CategoryStats:
+    category_avg: np.ndarray
+    median_expense: np.ndarray
+    score: np.ndarray
+    rating: np.ndarray
+
+
+def rate(table: SchemeTable) -> CategoryStats:
+    n_groups = table.n_groups
+    in_group = table.group >= 0
+    g = np.where(in_group, table.group, 0)
+
+    averages = np.column_stack([group_mean(table.returns[:, i], table.group, n_groups) for i in range(3)])
+    category_avg = np.where(in_group[:, None], averages[g], np.nan)
+    median_expense = np.where(in_group, group_median(table.expense, table.group, n_groups)[g], np.nan)
+
+    # Percentile of each metric, oriented so that higher is better, then a weighted mean over what's available.
+    metrics_pct = np.column_stack(
+        [group_percentile(table.returns[:, i], table.group, n_groups) for i in range(3)]
+        + [1 - group_percentile(table.expense, table.group, n_groups)]
+    )
+    available = np.isfinite(metrics_pct)
+    weights = np.where(available, SCORE_WEIGHTS, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = np.where(available, metrics_pct, 0.0) @ SCORE_WEIGHTS / weights.sum(axis=1)
+
+    # Ratings are bands of the score's percentile among scored peers, so each band holds a fixed share.
+    standing = group_percentile(score, table.group, n_groups)
+    scored = np.bincount(table.group[np.isfinite(score) & in_group], minlength=n_groups)
+    standing[~in_group | (scored[g] < MIN_PEERS)] = np.nan
+    rating = np.full(len(table), None, dtype=object)
+    rated = np.isfinite(standing)
+    thresholds = np.array([t for t, _ in RATING_BANDS])
+    labels = np.array([label for _, label in RATING_BANDS], dtype=object)
+    rating[rated] = labels[np.argmax(standing[rated, None] >= thresholds, axis=1)]
+    return CategoryStats(category_avg=category_avg, median_expense=median_expense, score=score, rating=rating)
+
+
+def _value(x: float) -> float | None:
+    return None if np.isnan(x) else round(float(x), 4)
+
+
+async def load_table(db: AsyncSession) -> SchemeTable:
+    result = await db.execute(select(
+        MFScheme.id, MFScheme.category, MFScheme.sub_category,
+        MFScheme.return_1y, MFScheme.return_3y, MFScheme.return_5y, MFScheme.expense_ratio,
+    ))
+    return SchemeTable.from_rows(result.all())
+
+
+async def refresh_category_stats(db: AsyncSession) -> dict:
+    """Recompute and store category averages, median expense and ratings for every scheme."""
+    started = time.perf_counter()
+    table = await load_table(db)
+    with metrics.timed("mf_analyzer.compute"):
+        stats = rate(table)
+
+    rows = [
+        {
+            "id": scheme_id,
+            "category_avg_1y": _value(avg[0]),
+            "category_avg_3y": _value(avg[1]),
+            "category_avg_5y": _value(avg[2]),
+            "category_median_expense": _value(expense),
+            "computed_rating": rating,
+        }
+        for scheme_id, avg, expense, rating in zip(table.id, stats.category_avg, stats.median_expense, stats.rating)
+    ]
+    if rows:
+        # ORM bulk UPDATE by primary key: one executemany for the whole table.
+        await db.execute(update(MFScheme), rows)
+    await db.commit()
+
+    summary = {
+        "schemes": len(table),
+        "groups": len(np.unique(table.group[table.group >= 0])),
+        "rated": int(sum(r is not None for r in stats.rating)),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    logger.info("MF category stats refreshed: %s", summary)
+    return summary
@@ -0,0 +1,35 @@
+from collections.abc import Iterable
+from sqlalchemy import Date, cast, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.mutual_fund import MFNavHistory, MFScheme
+
+
+async def ensure_partitions(db: AsyncSession, years: Iterable[int]):
+    """Create the yearly partitions of ``mf_nav_history`` that rows about to be written need."""
+    for year in sorted(set(years)):
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS mf_nav_history_{year:d} PARTITION OF mf_nav_history "
+            f"FOR VALUES FROM ('{year:d}-01-01') TO ('{year + 1:d}-01-01')"
+        ))
+
+
+def _upsert(stmt):
+    # A corrected NAV for a day replaces the old one; an unchanged one writes nothing.
+    return stmt.on_conflict_do_update(
+        index_elements=[MFNavHistory.scheme_id, MFNavHistory.nav_date],
+        set_={"nav": stmt.excluded.nav},
+        where=MFNavHistory.nav != stmt.excluded.nav,
+    )
+
+
+def upsert_statement():
+    return _upsert(pg_insert(MFNavHistory))
+
+
+def record_latest(amfi_codes: list[str]):
+    """INSERT ... SELECT of the current NAV of these schemes into the history."""
+    rows = select(MFScheme.id, cast(MFScheme.last_updated, Date), MFScheme.nav).where(
+        MFScheme.amfi_code.in_(amfi_codes), MFScheme.nav.isnot(None), MFScheme.last_updated.isnot(None),
+    )
+    return _upsert(pg_insert(MFNavHistory).from_select(["scheme_id", "nav_date", "nav"], rows))
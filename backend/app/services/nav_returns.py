@@ -0,0 +1,311 @@
+"""Trailing, rolling and money-weighted (XIRR) returns over NAV history.
+
+A chunk of schemes is held as one ``NavSeries``: flat day/NAV arrays sorted
+by scheme then date, with per-scheme offsets, so every calculation is a few
+NumPy passes over the whole chunk instead of a loop per scheme.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from collections.abc import Iterable
+from itertools import chain
+import numpy as np
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import metrics
+from app.config import settings
+from app.models.mutual_fund import MFNavHistory, MFScheme, MFTransaction
+from app.services.cas_parser import OPENING_BALANCE
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+HORIZONS = {"return_1y": 365, "return_3y": 3 * 365, "return_5y": 5 * 365}
+ROLLING_WINDOW_DAYS = 3 * 365
+# How far the NAV found for a start date may lie before it (weekends, holidays).
+GAP_TOLERANCE_DAYS = 7
+# Schemes whose latest NAV is older than this are treated as closed.
+STALE_DAYS = 10
+
+
+def day_number(d: date) -> int:
+    return (d - EPOCH).days
+
+
+@dataclass
+class NavSeries:
+    scheme_id: np.ndarray
+    offsets: np.ndarray
+    day: np.ndarray
+    nav: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.scheme_id)
+
+    @classmethod
+    def from_rows(cls, rows) -> "NavSeries":
+        """Rows of ``(scheme_id, [day, ...], [nav, ...])`` with each scheme's points in date order."""
+        scheme_ids, days, navs = zip(*rows) if rows else ((),) * 3
+        lengths = np.fromiter((len(d) for d in days), dtype=np.int64, count=len(days))
+        total = int(lengths.sum())
+        return cls(
+            scheme_id=np.array(scheme_ids, dtype=object),
+            offsets=np.r_[0, np.cumsum(lengths)],
+            day=np.fromiter(chain.from_iterable(days), dtype=np.int64, count=total),
+            nav=np.fromiter(chain.from_iterable(navs), dtype=np.float64, count=total),
+        )
+
+    @property
+    def segment(self) -> np.ndarray:
+        """Index of the scheme each point belongs to."""
+        return np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+    def keys(self) -> np.ndarray:
+        # (scheme, day) packed into one sorted int64, so a single searchsorted serves every scheme.
+        return (self.segment << 32) | self.day
+
+    def lookup(self, keys: np.ndarray, segment: np.ndarray, target_day: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Position of each scheme's last NAV on or before ``target_day``, and whether one exists close enough."""
+        position = np.searchsorted(keys, (segment << 32) | target_day, side="right") - 1
+        found = position >= self.offsets[segment]
+        position = np.where(found, position, 0)
+        found &= target_day - self.day[position] <= GAP_TOLERANCE_DAYS
+        return position, found
+
+
+def trailing_returns(series: NavSeries, as_of: date) -> dict[str, np.ndarray]:
+    """Point-to-point return per scheme and horizon, in percent; annualised (CAGR) beyond one year."""
+    n = len(series)
+    out = {name: np.full(n, np.nan) for name in HORIZONS}
+    if not n:
+        return out
+    has = np.diff(series.offsets) > 0
+    last = np.maximum(series.offsets[1:] - 1, 0)
+    end_day = series.day[last]
+    live = has & (end_day >= day_number(as_of) - STALE_DAYS)
+    keys = series.keys()
+    segment = np.arange(n)
+
+    for name, horizon in HORIZONS.items():
+        position, found = series.lookup(keys, segment, end_day - horizon)
+        ok = live & found
+        elapsed = (end_day - series.day[position]).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            growth = series.nav[last] / series.nav[position]
+            value = growth - 1 if horizon <= 365 else growth ** (365.0 / elapsed) - 1
+        out[name] = np.where(ok, value * 100, np.nan)
+    return out
+
+
+def rolling_returns(series: NavSeries, horizon: int = 365, window: int = ROLLING_WINDOW_DAYS) -> tuple[np.ndarray, np.ndarray]:
+    """Mean and worst ``horizon``-day return, in percent, over every start date in each scheme's last ``window`` days."""
+    n = len(series)
+    mean, worst = np.full(n, np.nan), np.full(n, np.nan)
+    if not len(series.day):
+        return mean, worst
+    segment = series.segment
+    end_day = series.day[np.maximum(series.offsets[1:] - 1, 0)]
+    points = np.flatnonzero(series.day >= end_day[segment] - window)
+    seg = segment[points]
+    position, found = series.lookup(series.keys(), seg, series.day[points] - horizon)
+    points, seg, position = points[found], seg[found], position[found]
+    if not len(points):
+        return mean, worst
+
+    value = (series.nav[points] / series.nav[position] - 1) * 100
+    # Points stay sorted by scheme, so each scheme's rolling returns are one contiguous run.
+    schemes, starts = np.unique(seg, return_index=True)
+    counts = np.diff(np.r_[starts, len(seg)])
+    mean[schemes] = np.add.reduceat(value, starts) / counts
+    worst[schemes] = np.minimum.reduceat(value, starts)
+    return mean, worst
+
+
+def xirr(group: np.ndarray, years: np.ndarray, cashflow: np.ndarray, n_groups: int,
+         iterations: int = 50, tolerance: float = 1e-7) -> np.ndarray:
+    """Annual rate solving NPV = 0 for every group's cash flows at once, by Newton's method.
+
+    ``years`` is each flow's time from the group's first flow; investments are
+    negative and redemptions or current value positive. NaN where flows don't
+    change sign or the iteration doesn't settle.
+    """
+    rate = np.full(n_groups, 0.1)
+    converged = np.zeros(n_groups, dtype=bool)
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        for _ in range(iterations):
+            base = 1 + rate[group]
+            discounted = cashflow * base ** -years
+            npv = np.bincount(group, weights=discounted, minlength=n_groups)
+            slope = np.bincount(group, weights=-years * discounted / base, minlength=n_groups)
+            step = npv / slope
+            rate = np.clip(rate - np.where(converged, 0, step), -0.9999, 1e6)
+            converged |= np.abs(step) < tolerance
+            if converged.all():
+                break
+    mixed = (np.bincount(group, weights=cashflow > 0, minlength=n_groups) > 0) & \
+        (np.bincount(group, weights=cashflow < 0, minlength=n_groups) > 0)
+    return np.where(converged & mixed & np.isfinite(rate), rate, np.nan)
+
+
+async def navs_on(db: AsyncSession, keys: Iterable[tuple[str, date]]) -> dict[tuple[str, date], float]:
+    """NAV of each ``(scheme_id, day)``, or of the closest earlier day within the gap tolerance, in one query."""
+    keys = set(keys)
+    if not keys:
+        return {}
+    result = await db.execute(
+        select(MFNavHistory.scheme_id, MFNavHistory.nav_date, MFNavHistory.nav)
+        .where(or_(*(
+            and_(
+                MFNavHistory.scheme_id == scheme_id,
+                MFNavHistory.nav_date.between(day - timedelta(days=GAP_TOLERANCE_DAYS), day),
+            )
+            for scheme_id, day in keys
+        )))
+        .order_by(MFNavHistory.scheme_id, MFNavHistory.nav_date)
+    )
+    by_scheme: dict[str, list[tuple[date, float]]] = {}
+    for scheme_id, nav_date, nav in result.all():
+        by_scheme.setdefault(scheme_id, []).append((nav_date, nav))
+    found = {}
+    for scheme_id, day in keys:
+        start = day - timedelta(days=GAP_TOLERANCE_DAYS)
+        # Rows are in date order, so the last one in the window is the closest.
+        window = [nav for nav_date, nav in by_scheme.get(scheme_id, ()) if start <= nav_date <= day]
+        if window:
+            found[(scheme_id, day)] = window[-1]
+    return found
+
+
+async def holding_xirrs(db: AsyncSession, user_id: str, current_values: dict[str, float], today: date | None = None) -> dict[str, float]:
+    """XIRR in percent of the user's CAS transactions per scheme, with ``current_values`` as the final inflow.
+
+    Units held before the statement period count as bought at the period
+    start's NAV, which the import stores on the opening row when it can;
+    schemes with such units and no NAV for that day get no XIRR rather than
+    one that ignores their cost.
+    """
+    if not current_values:
+        return {}
+    today = today or date.today()
+    result = await db.execute(
+        select(
+            MFTransaction.scheme_id, MFTransaction.folio, MFTransaction.trade_date, MFTransaction.amount,
+            MFTransaction.units, MFTransaction.nav, MFTransaction.balance, MFTransaction.description,
+        )
+        .where(MFTransaction.user_id == user_id, MFTransaction.scheme_id.in_(list(current_values)))
+        # Opening balances sort ahead of a same-day first transaction.
+        .order_by(MFTransaction.trade_date, MFTransaction.description != OPENING_BALANCE)
+    )
+    rows = result.all()
+    # Opening rows imported before NAV history covered their day are valued now, all in one lookup.
+    navs = await navs_on(db, (
+        (scheme_id, trade_date) for scheme_id, _, trade_date, _, _, nav, _, description in rows
+        if description == OPENING_BALANCE and not nav
+    ))
+
+    # Statement amounts are from the fund's side: purchases positive, redemptions negative.
+    flows: list[tuple[str, date, float]] = []
+    unvalued: set[str] = set()
+    opened: set[tuple[str, str | None]] = set()
+    first_seen: set[tuple[str, str | None]] = set()
+    for scheme_id, folio, trade_date, amount, units, nav, balance, description in rows:
+        if description == OPENING_BALANCE:
+            opened.add((scheme_id, folio))
+            nav = nav or navs.get((scheme_id, trade_date))
+            if not nav:
+                unvalued.add(scheme_id)
+                continue
+            amount = units * nav
+        elif (scheme_id, folio) not in first_seen:
+            first_seen.add((scheme_id, folio))
+            # Statements imported before opening balances were recorded: units held before the first
+            # transaction show up in its running balance.
+            if (scheme_id, folio) not in opened and balance - units > 1e-3:
+                unvalued.add(scheme_id)
+        flows.append((scheme_id, trade_date, -amount))
+    schemes = [s for s in current_values if s not in unvalued]
+    flows = [f for f in flows if f[0] not in unvalued]
+    if not flows or not schemes:
+        return {}
+
+    index = {scheme_id: i for i, scheme_id in enumerate(schemes)}
+    group = np.array([index[s] for s, _, _ in flows] + list(range(len(schemes))), dtype=np.int64)
+    day = np.array([day_number(d) for _, d, _ in flows] + [day_number(today)] * len(schemes), dtype=np.int64)
+    cashflow = np.array([c for _, _, c in flows] + [current_values[s] for s in schemes], dtype=np.float64)
+
+    first = np.full(len(schemes), np.iinfo(np.int64).max)
+    np.minimum.at(first, group, day)
+    rates = xirr(group, (day - first[group]) / 365.0, cashflow, len(schemes))
+    return {s: round(float(r) * 100, 2) for s, r in zip(schemes, rates) if np.isfinite(r)}
+
+
+async def load_series(db: AsyncSession, scheme_ids: list[str], since: date) -> NavSeries:
+    day = MFNavHistory.nav_date - EPOCH
+    result = await db.execute(
+        select(
+            MFNavHistory.scheme_id,
+            func.array_agg(aggregate_order_by(day, MFNavHistory.nav_date)),
+            func.array_agg(aggregate_order_by(MFNavHistory.nav, MFNavHistory.nav_date)),
+        )
+        .where(MFNavHistory.scheme_id.in_(scheme_ids), MFNavHistory.nav_date >= since)
+        .group_by(MFNavHistory.scheme_id)
+        .order_by(MFNavHistory.scheme_id)
+    )
+    return NavSeries.from_rows(result.all())
+
+
+def _value(x: float) -> float | None:
+    return None if np.isnan(x) else round(float(x), 4)
+
+
+async def refresh_returns(db: AsyncSession, today: date | None = None, chunk_size: int | None = None) -> dict:
+    """Recompute trailing and rolling returns for every scheme with history, a chunk of schemes at a time."""
+    today = today or date.today()
+    chunk_size = chunk_size or settings.nav_returns_chunk_size
+    started = time.perf_counter()
+    # The longest lookback: five years back from the last NAV, plus the slack a start date may need.
+    since = today - timedelta(days=max(HORIZONS.values()) + STALE_DAYS + GAP_TOLERANCE_DAYS)
+    result = await db.execute(select(MFScheme.id).order_by(MFScheme.id))
+    scheme_ids = list(result.scalars().all())
+    load_seconds = compute_seconds = 0.0
+    points = updated = 0
+
+    for i in range(0, len(scheme_ids), chunk_size):
+        chunk = scheme_ids[i:i + chunk_size]
+        t0 = time.perf_counter()
+        series = await load_series(db, chunk, since)
+        t1 = time.perf_counter()
+        trailing = trailing_returns(series, today)
+        rolling_avg, rolling_min = rolling_returns(series)
+        compute_seconds += time.perf_counter() - t1
+        load_seconds += t1 - t0
+        points += len(series.day)
+
+        # Schemes without history keep whatever returns they had.
+        rows = [
+            {
+                "id": scheme_id,
+                **{name: _value(values[j]) for name, values in trailing.items()},
+                "rolling_1y_avg": _value(rolling_avg[j]),
+                "rolling_1y_min": _value(rolling_min[j]),
+            }
+            for j, scheme_id in enumerate(series.scheme_id)
+        ]
+        if rows:
+            await db.execute(update(MFScheme), rows)
+        await db.commit()
+        updated += len(rows)
+
+    metrics.observe("nav_returns.load", load_seconds)
+    metrics.observe("nav_returns.compute", compute_seconds)
+    summary = {
+        "schemes": updated,
+        "points": points,
+        "load_seconds": round(load_seconds, 2),
+        "compute_seconds": round(compute_seconds, 2),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    logger.info("MF returns refreshed: %s", summary)
+    return summary
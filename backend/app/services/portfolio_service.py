@@ -0,0 +1,214 @@
+import logging
+from datetime import date
+import numpy as np
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app import metrics
+from app.models.portfolio import Holding, PortfolioValuation, RealizedGain
+from app.models.stock import Stock
+from app.models.tax_harvest import TaxHarvestRecommendation
+from app.schemas.portfolio import (
+    HoldingCreate, HoldingResponse, PortfolioSummary, RealizedGainResponse, SellRequest, SellResponse,
+)
+from app.services import cost_basis
+
+logger = logging.getLogger(__name__)
+
+
+def value_holding(holding: Holding, stock: Stock | None) -> HoldingResponse:
+    invested = holding.quantity * holding.buy_price
+    current = holding.quantity * (stock.current_price or holding.buy_price) if stock else invested
+    pnl = current - invested
+    return HoldingResponse(
+        id=holding.id,
+        stock_id=holding.stock_id,
+        quantity=holding.quantity,
+        buy_price=holding.buy_price,
+        buy_date=holding.buy_date,
+        created_at=holding.created_at,
+        stock_symbol=stock.symbol if stock else None,
+        stock_name=stock.name if stock else None,
+        current_price=stock.current_price if stock else None,
+        current_value=current,
+        invested_value=invested,
+        pnl=pnl,
+        pnl_percent=(pnl / invested * 100) if invested else 0,
+    )
+
+
+def _store(valuation: PortfolioValuation, entries: list[dict]):
+    # Entries are kept in lot queue order, so they double as the user's cost-basis book (see lot_book).
+    valuation.holdings = sorted(entries, key=cost_basis.queue_key)
+    # Totals are re-summed from the stored rows rather than adjusted by deltas, so float error never accumulates.
+    valuation.total_invested = sum(e["invested_value"] for e in entries)
+    valuation.current_value = sum(e["current_value"] for e in entries)
+
+
+async def _compute(db: AsyncSession, user_id: str) -> list[dict]:
+    result = await db.execute(
+        select(Holding).options(selectinload(Holding.stock)).where(Holding.user_id == user_id)
+        .order_by(Holding.stock_id, Holding.buy_date, Holding.created_at)
+    )
+    return [value_holding(h, h.stock).model_dump(mode="json") for h in result.scalars().all()]
+
+
+async def _lock_valuation(db: AsyncSession, user_id: str) -> PortfolioValuation:
+    """The user's valuation row, locked for this transaction; built from their holdings if missing."""
+    query = select(PortfolioValuation).where(PortfolioValuation.user_id == user_id).with_for_update()
+    valuation = (await db.execute(query)).scalar_one_or_none()
+    if valuation is None:
+        metrics.incr("portfolio.valuation.rebuild")
+        await db.execute(pg_insert(PortfolioValuation).values(user_id=user_id, holdings=[]).on_conflict_do_nothing())
+        valuation = (await db.execute(query)).scalar_one()
+        _store(valuation, await _compute(db, user_id))
+        realized = await db.execute(select(func.coalesce(func.sum(RealizedGain.gain), 0.0)).where(RealizedGain.user_id == user_id))
+        valuation.realized_gain = realized.scalar()
+    return valuation
+
+
+async def _read_valuation(db: AsyncSession, user_id: str) -> PortfolioValuation:
+    valuation = await db.get(PortfolioValuation, user_id)
+    if valuation is None:
+        valuation = await _lock_valuation(db, user_id)
+        await db.commit()
+    return valuation
+
+
+async def lot_book(db: AsyncSession, user_id: str) -> cost_basis.LotBook:
+    """The user's open lots and their unrealized gains, from the stored valuation rather than ``holdings``.
+
+    add_holding, sell and delete_holding add and remove its lots, and
+    reprice_stock refreshes their prices, all under the valuation lock.
+    """
+    return cost_basis.LotBook.from_entries((await _read_valuation(db, user_id)).holdings)
+
+
+async def get_summary(db: AsyncSession, user_id: str) -> PortfolioSummary:
+    valuation = await _read_valuation(db, user_id)
+    total_pnl = valuation.current_value - valuation.total_invested
+    return PortfolioSummary(
+        total_invested=valuation.total_invested,
+        current_value=valuation.current_value,
+        total_pnl=total_pnl,
+        total_pnl_percent=(total_pnl / valuation.total_invested * 100) if valuation.total_invested else 0,
+        realized_pnl=valuation.realized_gain,
+        holdings=valuation.holdings,
+    )
+
+
+async def add_holding(db: AsyncSession, user_id: str, data: HoldingCreate) -> HoldingResponse | None:
+    stock = await db.get(Stock, data.stock_id)
+    if not stock:
+        return None
+
+    valuation = await _lock_valuation(db, user_id)
+    holding = Holding(user_id=user_id, **data.model_dump())
+    db.add(holding)
+    await db.flush()
+
+    response = value_holding(holding, stock)
+    _store(valuation, [*valuation.holdings, response.model_dump(mode="json")])
+    await db.commit()
+    return response
+
+
+async def delete_holding(db: AsyncSession, user_id: str, holding_id: str) -> bool:
+    result = await db.execute(select(Holding).where(Holding.id == holding_id, Holding.user_id == user_id))
+    holding = result.scalar_one_or_none()
+    if not holding:
+        return False
+
+    valuation = await _lock_valuation(db, user_id)
+    await db.delete(holding)
+    _store(valuation, [e for e in valuation.holdings if e["id"] != holding_id])
+    await db.commit()
+    return True
+
+
+def _resize_entry(entry: dict, quantity: int) -> dict:
+    invested = quantity * entry["buy_price"]
+    current = quantity * (entry["current_price"] or entry["buy_price"])
+    pnl = current - invested
+    return {
+        **entry, "quantity": quantity, "invested_value": invested, "current_value": current, "pnl": pnl,
+        "pnl_percent": (pnl / invested * 100) if invested else 0,
+    }
+
+
+async def sell(db: AsyncSession, user_id: str, data: SellRequest) -> SellResponse:
+    """Close ``data.quantity`` units against the user's lots, FIFO unless ``lot_ids`` picks them.
+
+    Raises ValueError if the lots can't cover the sale.
+    """
+    valuation = await _lock_valuation(db, user_id)
+    book = cost_basis.LotBook.from_entries([e for e in valuation.holdings if e["stock_id"] == data.stock_id])
+    rows, take = book.allocate(data.stock_id, data.quantity, data.lot_ids)
+
+    gains = take * (data.sell_price - book.buy_price[rows])
+    short_term = cost_basis.is_short_term(book.buy_date[rows], data.sell_date)
+    lots = [
+        RealizedGainResponse(
+            holding_id=book.holding_id[r], quantity=int(q), buy_price=float(book.buy_price[r]),
+            buy_date=book.buy_date[r].astype(date), sell_price=data.sell_price, sell_date=data.sell_date,
+            gain=float(g), is_short_term=bool(s),
+        )
+        for r, q, g, s in zip(rows, take, gains, short_term)
+    ]
+    await db.execute(insert(RealizedGain), [
+        {"user_id": user_id, "stock_id": data.stock_id, **lot.model_dump()} for lot in lots
+    ])
+
+    remaining = book.quantity[rows] - take
+    closed = set(book.holding_id[rows][remaining == 0])
+    resized = {book.holding_id[r]: int(q) for r, q in zip(rows, remaining) if q > 0}
+    touched = [*closed, *resized]
+    # Pending advice for these lots no longer matches what is held; the next analysis recreates it.
+    await db.execute(delete(TaxHarvestRecommendation).where(
+        TaxHarvestRecommendation.holding_id.in_(list(closed))
+        | (TaxHarvestRecommendation.holding_id.in_(touched) & (TaxHarvestRecommendation.status == "pending"))
+    ))
+    if closed:
+        await db.execute(delete(Holding).where(Holding.id.in_(list(closed))))
+    if resized:
+        await db.execute(
+            update(Holding),
+            [{"id": holding_id, "quantity": quantity} for holding_id, quantity in resized.items()],
+        )
+
+    _store(valuation, [
+        _resize_entry(e, resized[e["id"]]) if e["id"] in resized else e
+        for e in valuation.holdings if e["id"] not in closed
+    ])
+    realized = float(np.sum(gains))
+    valuation.realized_gain += realized
+    await db.commit()
+    return SellResponse(realized_gain=realized, lots=lots)
+
+
+async def reprice_stock(db: AsyncSession, stock_id: str, price: float | None):
+    """Revalue ``stock_id`` in every portfolio holding it; runs in the caller's transaction."""
+    holders = select(Holding.user_id).where(Holding.stock_id == stock_id)
+    result = await db.execute(
+        select(PortfolioValuation)
+        .where(PortfolioValuation.user_id.in_(holders))
+        .order_by(PortfolioValuation.user_id)  # consistent lock order between concurrent scrapes
+        .with_for_update()
+    )
+    valuations = result.scalars().all()
+    for valuation in valuations:
+        entries = []
+        for e in valuation.holdings:
+            if e["stock_id"] == stock_id:
+                current = e["quantity"] * (price or e["buy_price"])
+                pnl = current - e["invested_value"]
+                e = {
+                    **e, "current_price": price, "current_value": current, "pnl": pnl,
+                    "pnl_percent": (pnl / e["invested_value"] * 100) if e["invested_value"] else 0,
+                }
+            entries.append(e)
+        _store(valuation, entries)
+    if valuations:
+        metrics.incr("portfolio.valuation.reprice", len(valuations))
+        logger.info("Repriced %s in %d portfolios", stock_id, len(valuations))
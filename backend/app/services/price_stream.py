@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from contextlib import contextmanager
+from redis.exceptions import RedisError
+from app import metrics
+from app.services.scraper.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+PRICE_CHANNEL = "prices"
+
+
+async def publish_price(symbol: str, price: float | None):
+    r = await get_redis()
+    try:
+        await r.publish(PRICE_CHANNEL, json.dumps({"symbol": symbol.upper(), "price": price}))
+    except RedisError as e:
+        logger.warning("Price publish failed for %s: %s", symbol, e)
+        metrics.incr("price_stream.publish_error")
+
+
+class Subscriber:
+    """Pending updates for one connection.
+
+    Only the latest price per symbol is kept, so a slow client costs at most
+    one entry per symbol it follows and never blocks the fan-out.
+    """
+
+    def __init__(self, symbols: set[str]):
+        self.symbols = symbols
+        self._pending: dict[str, dict] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, event: dict):
+        self._pending[event["symbol"]] = event
+        self._ready.set()
+
+    async def next_batch(self, timeout: float) -> list[dict]:
+        """Updates since the last call, or an empty list after ``timeout`` seconds of quiet."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        batch, self._pending = list(self._pending.values()), {}
+        return batch
+
+
+_subscribers: dict[str, set[Subscriber]] = {}
+
+
+@contextmanager
+def subscribe(symbols: set[str]):
+    subscriber = Subscriber(symbols)
+    for symbol in symbols:
+        _subscribers.setdefault(symbol, set()).add(subscriber)
+    metrics.incr("price_stream.open_connections")
+    try:
+        yield subscriber
+    finally:
+        for symbol in symbols:
+            subs = _subscribers.get(symbol)
+            if subs is not None:
+                subs.discard(subscriber)
+                if not subs:
+                    del _subscribers[symbol]
+        metrics.incr("price_stream.open_connections", -1)
+
+
+def dispatch(event: dict):
+    for subscriber in _subscribers.get(event["symbol"], ()):
+        subscriber.push(event)
+
+
+async def listen_for_prices(retry_seconds: float = 5.0):
+    """One Redis subscription per worker, fanned out in-process to every open stream."""
+    while True:
+        pubsub = None
+        try:
+            r = await get_redis()
+            pubsub = r.pubsub()
+            await pubsub.subscribe(PRICE_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                dispatch(json.loads(message["data"]))
+                metrics.incr("price_stream.received")
+        except RedisError as e:
+            logger.warning("Price listener disconnected: %s", e)
+            await asyncio.sleep(retry_seconds)
+        finally:
+            if pubsub is not None:
+                await pubsub.reset()
+
+
+async def stream_events(subscriber: Subscriber, snapshot: list[dict], heartbeat_seconds: float) -> AsyncIterator[str]:
+    yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+    while True:
+        batch = await subscriber.next_batch(heartbeat_seconds)
+        if not batch:
+            # Comment line; keeps proxies from closing the idle connection.
+            yield ": keepalive\n\n"
+            continue
+        for event in batch:
+            yield f"event: price\ndata: {json.dumps(event)}\n\n"
@@ -0,0 +1,78 @@
+"""Track scrapes queued on Celery so HTTP handlers can return 202 instead of waiting on screener.in."""
+import asyncio
+import uuid
+from app.services.scraper.cache import get_redis
+from app.tasks.celery_app import celery
+
+JOB_TTL_SECONDS = 3600
+TERMINAL_STATUSES = {"success", "failed"}
+
+
+def job_key(job_id: str) -> str:
+    return f"scrape:job:{job_id}"
+
+
+def symbol_job_key(symbol: str) -> str:
+    return f"scrape:job:symbol:{symbol.upper()}"
+
+
+async def enqueue_scrape(symbol: str, force: bool = False) -> dict:
+    """Queue a scrape of ``symbol``, or return the job already queued for it."""
+    symbol = symbol.upper()
+    r = await get_redis()
+    job_id = str(uuid.uuid4())
+    # The job exists before the symbol points at it, so a concurrent caller that loses the claim always finds it.
+    await r.hset(job_key(job_id), mapping={"symbol": symbol, "status": "pending", "error": ""})
+    await r.expire(job_key(job_id), JOB_TTL_SECONDS)
+    if not await r.set(symbol_job_key(symbol), job_id, nx=True, ex=JOB_TTL_SECONDS):
+        existing = await r.get(symbol_job_key(symbol))
+        job = await get_job(existing.decode()) if existing else None
+        if job is not None:
+            await r.delete(job_key(job_id))
+            return job
+        # The symbol points at a job that expired; take it over.
+        await r.set(symbol_job_key(symbol), job_id, ex=JOB_TTL_SECONDS)
+
+    try:
+        celery.send_task(
+            "app.tasks.scrape_stocks.scrape_single_stock",
+            args=[symbol],
+            kwargs={"force": force},
+            task_id=job_id,
+        )
+    except Exception:
+        await r.delete(symbol_job_key(symbol), job_key(job_id))
+        raise
+    return {"job_id": job_id, "symbol": symbol, "status": "pending", "error": None}
+
+
+async def get_job(job_id: str) -> dict | None:
+    r = await get_redis()
+    fields = await r.hgetall(job_key(job_id))
+    if not fields:
+        return None
+    fields = {k.decode(): v.decode() for k, v in fields.items()}
+    return {"job_id": job_id, "symbol": fields["symbol"], "status": fields["status"], "error": fields["error"] or None}
+
+
+async def update_job(job_id: str, status: str, error: str | None = None):
+    r = await get_redis()
+    if not await r.exists(job_key(job_id)):
+        return
+    await r.hset(job_key(job_id), mapping={"status": status, "error": error or ""})
+    if status in TERMINAL_STATUSES:
+        symbol = (await r.hget(job_key(job_id), "symbol")).decode()
+        # Later requests for the symbol should start a fresh job, not report this one.
+        if await r.get(symbol_job_key(symbol)) == job_id.encode():
+            await r.delete(symbol_job_key(symbol))
+
+
+async def wait_for_job(job_id: str, timeout: float, poll_seconds: float = 0.5) -> dict | None:
+    """Long-poll until the job finishes or ``timeout`` elapses; returns its latest state."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    job = await get_job(job_id)
+    while job is not None and job["status"] not in TERMINAL_STATUSES and loop.time() < deadline:
+        await asyncio.sleep(poll_seconds)
+        job = await get_job(job_id)
+    return job
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from functools import partial
+import httpx
+from app.config import settings
+from app.database import async_session
+from app.services.scraper import http_client, singleflight
+from app.services.scraper.rate_limiter import TokenBucket
+from app.services.scraper.screener_scraper import ScreenerScraper
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BulkScrapeResult:
+    succeeded: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    outcomes: dict[str, int] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+
+
+class BulkScraper:
+    """Scrapes many symbols with a bounded worker pool behind one shared rate limiter.
+
+    Every worker reuses the process-wide pooled ``httpx.AsyncClient`` and opens
+    its own DB session per symbol, so a failure on one symbol never poisons the
+    others.
+    """
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        requests_per_second: float | None = None,
+        burst: int | None = None,
+    ):
+        self.concurrency = concurrency or settings.scraper_concurrency
+        self.rate_limiter = TokenBucket(
+            requests_per_second or settings.scraper_requests_per_second,
+            burst or settings.scraper_burst,
+        )
+
+    async def run(self, symbols: list[str]) -> BulkScrapeResult:
+        result = BulkScrapeResult()
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        for symbol in symbols:
+            queue.put_nowait(symbol)
+
+        started = time.monotonic()
+        client = http_client.get_client()
+        workers = [
+            asyncio.create_task(self._worker(queue, client, result))
+            for _ in range(min(self.concurrency, len(symbols)))
+        ]
+        await asyncio.gather(*workers)
+        result.elapsed_seconds = time.monotonic() - started
+        return result
+
+    async def _scrape(self, symbol: str, client: httpx.AsyncClient) -> str | None:
+        async with async_session() as db:
+            scraper = ScreenerScraper(db, client=client, rate_limiter=self.rate_limiter)
+            await scraper.scrape_stock(symbol)
+            return scraper.last_outcome
+
+    async def _worker(self, queue: asyncio.Queue, client: httpx.AsyncClient, result: BulkScrapeResult):
+        while True:
+            try:
+                symbol = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                outcome = await singleflight.run_exclusive(symbol, partial(self._scrape, symbol, client))
+                outcome = outcome or "coalesced"
+                result.succeeded.append(symbol)
+                result.outcomes[outcome] = result.outcomes.get(outcome, 0) + 1
+            except Exception as e:
+                logger.warning("Error scraping %s: %s", symbol, e)
+                result.failed[symbol] = str(e)
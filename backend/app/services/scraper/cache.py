@@ -1,10 +1,57 @@
+import asyncio
 import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
 import redis.asyncio as redis
+from redis.exceptions import RedisError
+from app import metrics
 from app.config import settings
+from app.services.scraper.codec import get_codec
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
 
 _redis = None
 
 
+class LocalCache:
+    """Bounded in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value, ttl_seconds: float):
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+_local = LocalCache(settings.cache_local_max_entries)
+_inflight: dict[str, asyncio.Task] = {}
+
+
 async def get_redis():
     global _redis
     if _redis is None:
@@ -14,12 +61,158 @@ async def get_redis():
 
 async def get_cached(key: str) -> dict | None:
     r = await get_redis()
-    data = await r.get(key)
-    if data:
-        return json.loads(data)
-    return None
+    started = time.perf_counter()
+    try:
+        data = await r.get(key)
+    except RedisError as e:
+        # The cache is an optimisation; treat an unreachable Redis as a miss.
+        logger.warning("Cache read failed for %s: %s", key, e)
+        metrics.incr("cache.redis.error")
+        return None
+    finally:
+        metrics.observe("cache.redis.get", time.perf_counter() - started)
+    if not data:
+        return None
+    try:
+        return get_codec().decode(data)
+    except Exception as e:
+        # Written by a newer or unknown format; let the caller recompute and overwrite it.
+        logger.warning("Cache decode failed for %s: %s", key, e)
+        metrics.incr("cache.decode_error")
+        return None
 
 
 async def set_cached(key: str, value: dict, ttl_seconds: int = 900):
     r = await get_redis()
-    await r.setex(key, ttl_seconds, json.dumps(value))
+    started = time.perf_counter()
+    try:
+        await r.setex(key, ttl_seconds, get_codec().encode(value))
+    except RedisError as e:
+        logger.warning("Cache write failed for %s: %s", key, e)
+        metrics.incr("cache.redis.error")
+    finally:
+        metrics.observe("cache.redis.set", time.perf_counter() - started)
+
+
+async def delete_cached(*keys: str):
+    r = await get_redis()
+    try:
+        await r.delete(*keys)
+    except RedisError as e:
+        logger.warning("Cache delete failed for %s: %s", keys, e)
+        metrics.incr("cache.redis.error")
+
+
+async def get_counter(key: str) -> int:
+    local = _local.get(key)
+    if local is not None:
+        return local
+    r = await get_redis()
+    try:
+        value = await r.get(key)
+    except RedisError as e:
+        logger.warning("Cache read failed for %s: %s", key, e)
+        metrics.incr("cache.redis.error")
+        return 0
+    value = int(value) if value else 0
+    _local.set(key, value, settings.cache_local_ttl_seconds)
+    return value
+
+
+async def incr_counter(key: str) -> int:
+    r = await get_redis()
+    try:
+        return await r.incr(key)
+    except RedisError as e:
+        logger.warning("Cache incr failed for %s: %s", key, e)
+        metrics.incr("cache.redis.error")
+        return 0
+
+
+async def get_or_compute(
+    key: str,
+    loader: Callable[[], Awaitable[dict | None]],
+    ttl_seconds: int,
+    name: str = "default",
+) -> dict | None:
+    """Read ``key`` from the local tier, then Redis, then ``loader``.
+
+    Concurrent misses for the same key in this process share one lookup:
+    the first caller runs it and the rest await its result. ``None`` results
+    are not cached.
+    """
+    value = _local.get(key)
+    if value is not None:
+        metrics.incr(f"cache.{name}.local_hit")
+        return value
+
+    task = _inflight.get(key)
+    if task is not None:
+        metrics.incr(f"cache.{name}.coalesced")
+    else:
+        task = asyncio.ensure_future(_fill(key, loader, ttl_seconds, name))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shielded so one caller disconnecting doesn't cancel the lookup the others are waiting on.
+    return await asyncio.shield(task)
+
+
+async def _fill(key: str, loader, ttl_seconds: int, name: str) -> dict | None:
+    value = await get_cached(key)
+    if value is not None:
+        metrics.incr(f"cache.{name}.redis_hit")
+    else:
+        metrics.incr(f"cache.{name}.miss")
+        value = await loader()
+        if value is None:
+            return None
+        await set_cached(key, value, ttl_seconds)
+    _local.set(key, value, min(ttl_seconds, settings.cache_local_ttl_seconds))
+    return value
+
+
+async def invalidate(*keys: str):
+    """Evict ``keys`` from Redis and from the local tier of every process."""
+    await delete_cached(*keys)
+    await publish_invalidation(*keys)
+
+
+async def publish_invalidation(*keys: str):
+    for key in keys:
+        _local.delete(key)
+    r = await get_redis()
+    try:
+        await r.publish(INVALIDATION_CHANNEL, json.dumps(list(keys)))
+    except RedisError as e:
+        logger.warning("Cache invalidation publish failed for %s: %s", keys, e)
+        metrics.incr("cache.redis.error")
+
+
+async def listen_for_invalidations(retry_seconds: float = 5.0):
+    """Evict keys published by other processes; runs for the lifetime of the API worker."""
+    while True:
+        pubsub = None
+        try:
+            r = await get_redis()
+            pubsub = r.pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    for key in json.loads(message["data"]):
+                        _local.delete(key)
+                except (ValueError, TypeError) as e:
+                    # A bad payload must not take down the listener and leave local entries stale for good.
+                    logger.warning("Ignoring malformed cache invalidation %r: %s", message["data"], e)
+                    metrics.incr("cache.invalidation.malformed")
+                    continue
+                metrics.incr("cache.invalidation.received")
+        except RedisError as e:
+            logger.warning("Cache invalidation listener disconnected: %s", e)
+            # Invalidations may have been missed while disconnected.
+            _local.clear()
+            await asyncio.sleep(retry_seconds)
+        finally:
+            if pubsub is not None:
+                await pubsub.reset()
@@ -0,0 +1,110 @@
+"""Binary envelope for cached values: ``[version][codec << 4 | compression][payload]``.
+
+Values written before the envelope existed are bare JSON, which always starts
+with ``{`` or ``[``; those are still decoded.
+"""
+import json
+import logging
+import zlib
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+def _json_codec():
+    return (lambda v: json.dumps(v, separators=(",", ":")).encode()), json.loads
+
+
+def _orjson_codec():
+    import orjson
+    return orjson.dumps, orjson.loads
+
+
+def _msgpack_codec():
+    import msgpack
+    return msgpack.packb, msgpack.unpackb
+
+
+def _zlib_compression():
+    return zlib.compress, zlib.decompress
+
+
+def _zstd_compression():
+    import zstandard
+    return zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress
+
+
+def _lz4_compression():
+    import lz4.frame
+    return lz4.frame.compress, lz4.frame.decompress
+
+
+CODECS = {"json": (0, _json_codec), "orjson": (1, _orjson_codec), "msgpack": (2, _msgpack_codec)}
+COMPRESSIONS = {
+    "none": (0, lambda: (bytes, bytes)),
+    "zlib": (1, _zlib_compression),
+    "zstd": (2, _zstd_compression),
+    "lz4": (3, _lz4_compression),
+}
+
+_loaded: dict = {}
+
+
+def _load(table: dict, name: str, fallback: str):
+    if name not in _loaded:
+        try:
+            _loaded[name] = (table[name][0], *table[name][1]())
+        except (ImportError, KeyError):
+            logger.warning("Cache format %r is unknown or not installed; using %r", name, fallback)
+            _loaded[name] = _load(table, fallback, fallback)
+    return _loaded[name]
+
+
+def _by_id(table: dict, ident: int):
+    for name, (table_id, _) in table.items():
+        if table_id == ident:
+            return _load(table, name, name)
+    raise ValueError(f"Unknown cache format id {ident}")
+
+
+class CacheCodec:
+    def __init__(self, codec: str | None = None, compression: str | None = None, compress_min_bytes: int | None = None):
+        self.codec_id, self._dumps, _ = _load(CODECS, codec or settings.cache_codec, "json")
+        self.compression_id, self._compress, _ = _load(
+            COMPRESSIONS, compression or settings.cache_compression, "zlib"
+        )
+        self.compress_min_bytes = (
+            compress_min_bytes if compress_min_bytes is not None else settings.cache_compress_min_bytes
+        )
+
+    def encode(self, value) -> bytes:
+        payload = self._dumps(value)
+        compression_id = 0
+        if self.compression_id and len(payload) >= self.compress_min_bytes:
+            payload = self._compress(payload)
+            compression_id = self.compression_id
+        return bytes((FORMAT_VERSION, self.codec_id << 4 | compression_id)) + payload
+
+    @staticmethod
+    def decode(data: bytes):
+        if data[:1] in (b"{", b"["):
+            return json.loads(data)
+        if data[0] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cache format version {data[0]}")
+        codec_id, compression_id = data[1] >> 4, data[1] & 0x0F
+        payload = data[2:]
+        if compression_id:
+            payload = _by_id(COMPRESSIONS, compression_id)[2](payload)
+        return _by_id(CODECS, codec_id)[2](payload)
+
+
+_codec: CacheCodec | None = None
+
+
+def get_codec() -> CacheCodec:
+    global _codec
+    if _codec is None:
+        _codec = CacheCodec()
+    return _codec
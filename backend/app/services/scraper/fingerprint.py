@@ -0,0 +1,31 @@
+import hashlib
+import re
+
+# Bump when the parser starts reading something new, so every page is re-parsed once.
+FINGERPRINT_VERSION = "1"
+
+_NOISE = re.compile(r"<(script|style|noscript|svg)\b.*?</\1\s*>|<!--.*?-->", re.S | re.I)
+_TAG_ATTRS = re.compile(r"<(/?[a-zA-Z][a-zA-Z0-9-]*)\b[^>]*>")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint_page(html: str) -> str:
+    """Hash the data-bearing part of a screener page.
+
+    Only the span from the company heading to the end of the shareholding
+    section is hashed, with scripts, comments, tag attributes and whitespace
+    stripped, so CSRF tokens, ads and markup tweaks don't count as changes.
+    """
+    start = html.find("<h1")
+    if start == -1:
+        start = 0
+    end = len(html)
+    sh = html.find('id="shareholding"', start)
+    if sh != -1:
+        close = html.find("</section>", sh)
+        if close != -1:
+            end = close
+    body = _NOISE.sub("", html[start:end])
+    body = _TAG_ATTRS.sub(r"<\1>", body)
+    body = _WHITESPACE.sub(" ", body)
+    return hashlib.sha256(f"{FINGERPRINT_VERSION}:{body}".encode()).hexdigest()
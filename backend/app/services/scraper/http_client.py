@@ -0,0 +1,51 @@
+import logging
+import httpx
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: httpx.AsyncClient | None = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_client() -> httpx.AsyncClient:
+    http2 = settings.scraper_http2
+    if http2 and not _http2_available():
+        logger.warning("scraper_http2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=settings.scraper_timeout_seconds,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.scraper_max_connections,
+            max_keepalive_connections=settings.scraper_max_keepalive_connections,
+            keepalive_expiry=settings.scraper_keepalive_expiry_seconds,
+        ),
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the process-wide client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
+
+
+async def open_client() -> httpx.AsyncClient:
+    return get_client()
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,254 @@
+import logging
+from bs4 import BeautifulSoup
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RATIO_MAP = {
+    "Market Cap": "market_cap", "Current Price": "current_price",
+    "Stock P/E": "pe_ratio", "Book Value": "book_value",
+    "Dividend Yield": "dividend_yield", "ROCE": "roce",
+    "ROE": "roe", "Face Value": "face_value",
+}
+
+# section id -> (data key, period key, row label -> field, strip "%" from values)
+TABLE_SECTIONS = {
+    "quarters": (
+        "quarterly", "quarter",
+        {"Sales": "revenue", "Net Profit": "net_profit", "EPS": "eps", "OPM": "opm_percent"},
+        True,
+    ),
+    "profit-loss": ("annual", "fiscal_year", {"Sales": "revenue", "Net Profit": "net_profit"}, False),
+    "shareholding": (
+        "shareholding", "quarter",
+        {"Promoters": "promoter_percent", "FIIs": "fii_percent", "DIIs": "dii_percent", "Public": "public_percent"},
+        True,
+    ),
+}
+
+
+def _build_ratios(items: list[tuple[str, str]]) -> dict:
+    ratios = {}
+    for name_text, val_text in items:
+        name = name_text.rstrip(" ₹%")
+        val_text = val_text.replace(",", "").replace("₹", "").strip()
+        if name == "High / Low" and "/" in val_text:
+            parts = val_text.split("/")
+            try:
+                ratios["high_52w"] = float(parts[0].strip())
+                ratios["low_52w"] = float(parts[1].strip())
+            except (ValueError, IndexError):
+                pass
+            continue
+        attr = RATIO_MAP.get(name)
+        if attr and val_text:
+            try:
+                ratios[attr] = float(val_text.replace("%", ""))
+            except ValueError:
+                pass
+    return ratios
+
+
+def _build_table(headers: list[str], rows: list[list[str]], period_key: str, field_map: dict, strip_percent: bool) -> list[dict]:
+    row_data: dict[str, dict] = {}
+    for cells in rows:
+        field = field_map.get(cells[0])
+        if not field:
+            continue
+        for i, cell in enumerate(cells[1:], 1):
+            if i >= len(headers):
+                break
+            period = headers[i]
+            if period not in row_data:
+                row_data[period] = {period_key: period}
+            val = cell.replace(",", "")
+            if strip_percent:
+                val = val.replace("%", "")
+            try:
+                row_data[period][field] = float(val)
+            except ValueError:
+                pass
+    return list(row_data.values())
+
+
+def build_page_data(extracted: dict) -> dict:
+    """Turn the raw text pulled out by a parser backend into the scraper's ``data`` dict."""
+    data = {"ratios": {}, "quarterly": [], "annual": [], "shareholding": []}
+    if extracted["name"] is not None:
+        data["ratios"]["name"] = extracted["name"]
+    data["ratios"].update(_build_ratios(extracted["ratios"]))
+    for key in ("pros", "cons"):
+        if extracted[key] is not None:
+            data[key] = "\n".join(extracted[key]) if extracted[key] else None
+    if extracted["about"] is not None:
+        data["about"] = extracted["about"]
+    for section_id, (data_key, period_key, field_map, strip_percent) in TABLE_SECTIONS.items():
+        table = extracted["tables"].get(section_id)
+        if table is not None:
+            data[data_key] = _build_table(*table, period_key, field_map, strip_percent) if table else []
+    return data
+
+
+class SoupParser:
+    """BeautifulSoup/CSS-selector backend; the reference implementation."""
+
+    def __init__(self, features: str = "html.parser"):
+        self.features = features
+
+    def extract(self, html: str) -> dict:
+        soup = BeautifulSoup(html, self.features)
+        extracted = {"name": None, "ratios": [], "pros": None, "cons": None, "about": None, "tables": {}}
+
+        name_el = soup.select_one("h1")
+        if name_el:
+            extracted["name"] = name_el.get_text(strip=True)
+
+        for li in soup.select("#top-ratios li"):
+            name_el = li.select_one(".name")
+            val_el = li.select_one(".number")
+            if name_el and val_el:
+                extracted["ratios"].append((name_el.get_text(strip=True), val_el.get_text(strip=True)))
+
+        for key in ("pros", "cons"):
+            section = soup.select_one(f".{key}")
+            if section:
+                extracted[key] = [li.get_text(strip=True) for li in section.select("li")]
+
+        about_el = soup.select_one(".about p")
+        if about_el:
+            extracted["about"] = about_el.get_text(strip=True)
+
+        for section_id in TABLE_SECTIONS:
+            section = soup.select_one(f"#{section_id}")
+            if not section:
+                continue
+            table = section.select_one("table")
+            if not table:
+                extracted["tables"][section_id] = ()
+                continue
+            headers = [th.get_text(strip=True) for th in table.select("thead th")]
+            rows = []
+            for row in table.select("tbody tr"):
+                cells = [td.get_text(strip=True) for td in row.select("td")]
+                if cells:
+                    rows.append(cells)
+            extracted["tables"][section_id] = (headers, rows)
+        return extracted
+
+    def parse(self, html: str) -> dict:
+        return build_page_data(self.extract(html))
+
+
+class LxmlParser:
+    """libxml2-backed parser that locates every section in a single walk of the tree."""
+
+    def __init__(self):
+        import lxml.html
+        from lxml import etree
+
+        self._html = lxml.html
+        # BeautifulSoup's get_text() skips comments and script/style/template contents.
+        self._text_nodes = etree.XPath(".//text()[not(ancestor::script or ancestor::style or ancestor::template)]")
+
+    def _text(self, el) -> str:
+        # Same result as BeautifulSoup's get_text(strip=True).
+        return "".join(s.strip() for s in self._text_nodes(el))
+
+    @staticmethod
+    def _classes(el) -> list[str]:
+        return (el.get("class") or "").split()
+
+    def extract(self, html: str) -> dict:
+        extracted = {"name": None, "ratios": [], "pros": None, "cons": None, "about": None, "tables": {}}
+        if not html.strip():
+            return extracted
+        root = self._html.document_fromstring(html)
+
+        name_el = top_ratios = about_p = None
+        sections = {}
+        for el in root.iter():
+            if not isinstance(el.tag, str):
+                continue
+            if name_el is None and el.tag == "h1":
+                name_el = el
+            el_id = el.get("id")
+            if el_id == "top-ratios" and top_ratios is None:
+                top_ratios = el
+            elif el_id in TABLE_SECTIONS and el_id not in sections:
+                sections[el_id] = el
+            classes = self._classes(el)
+            if not classes:
+                continue
+            for key in ("pros", "cons"):
+                if key in classes and key not in sections:
+                    sections[key] = el
+            if about_p is None and "about" in classes:
+                about_p = next(el.iter("p"), None)
+
+        if name_el is not None:
+            extracted["name"] = self._text(name_el)
+
+        if top_ratios is not None:
+            for li in top_ratios.iter("li"):
+                name = value = None
+                for child in li.iter():
+                    if child is li or not isinstance(child.tag, str):
+                        continue
+                    classes = self._classes(child)
+                    if name is None and "name" in classes:
+                        name = child
+                    if value is None and "number" in classes:
+                        value = child
+                if name is not None and value is not None:
+                    extracted["ratios"].append((self._text(name), self._text(value)))
+
+        for key in ("pros", "cons"):
+            if key in sections:
+                extracted[key] = [self._text(li) for li in sections[key].iter("li") if li is not sections[key]]
+
+        if about_p is not None:
+            extracted["about"] = self._text(about_p)
+
+        for section_id in TABLE_SECTIONS:
+            section = sections.get(section_id)
+            if section is None:
+                continue
+            table = next((t for t in section.iter("table") if t is not section), None)
+            if table is None:
+                extracted["tables"][section_id] = ()
+                continue
+            headers = [self._text(th) for th in table.xpath(".//thead//th")]
+            rows = []
+            for row in table.xpath(".//tbody//tr"):
+                cells = [self._text(td) for td in row.xpath(".//td")]
+                if cells:
+                    rows.append(cells)
+            extracted["tables"][section_id] = (headers, rows)
+        return extracted
+
+    def parse(self, html: str) -> dict:
+        return build_page_data(self.extract(html))
+
+
+BACKENDS = {
+    "lxml": LxmlParser,
+    "html.parser": lambda: SoupParser("html.parser"),
+    "soup-lxml": lambda: SoupParser("lxml"),
+}
+
+_parsers: dict = {}
+
+
+def get_parser(name: str | None = None):
+    name = name or settings.scraper_parser_backend
+    if name not in _parsers:
+        try:
+            _parsers[name] = BACKENDS[name]()
+        except ImportError:
+            logger.warning("Parser backend %r is unavailable; falling back to html.parser", name)
+            _parsers[name] = get_parser("html.parser")
+    return _parsers[name]
+
+
+def parse_page(html: str, backend: str | None = None) -> dict:
+    return get_parser(backend).parse(html)
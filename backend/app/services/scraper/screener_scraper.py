@@ -1,37 +1,155 @@
 import random
+import time
+import uuid
 from datetime import datetime
-from bs4 import BeautifulSoup
 import httpx
-from sqlalchemy import select
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from app import metrics
 from app.config import settings
-from app.models.stock import Stock, QuarterlyResult, AnnualResult, ShareholdingPattern
+from app.models.stock import Stock, QuarterlyResult, AnnualResult, ShareholdingPattern, ScrapeState
+from app.services import portfolio_service, price_stream, stock_service
+from app.services.cpu_pool import run_cpu_bound
+from app.services.scraper import http_client
+from app.services.scraper.fingerprint import fingerprint_page
+from app.services.scraper.parsers import parse_page
+from app.services.scraper.rate_limiter import TokenBucket
+
+
+async def _trace(event_name: str, info: dict):
+    if event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+        metrics.incr(f"scraper.{event_name}")
 
 
 class ScreenerScraper:
     BASE_URL = "https://www.screener.in/company/{symbol}/consolidated/"
 
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        client: httpx.AsyncClient | None = None,
+        rate_limiter: TokenBucket | None = None,
+    ):
         self.db = db
-
-    async def scrape_stock(self, symbol: str) -> Stock:
-        url = self.BASE_URL.format(symbol=symbol)
+        self.client = client
+        self.rate_limiter = rate_limiter
+        self.last_outcome: str | None = None
+
+    def _record_outcome(self, outcome: str):
+        self.last_outcome = outcome
+        metrics.incr(f"scraper.outcome.{outcome}")
+
+    def _update_state(self, state: ScrapeState | None, symbol: str, resp: httpx.Response, content_hash: str) -> bool:
+        """Store the validators and fingerprint of ``resp``; returns whether anything changed."""
+        fields = {
+            "url": str(resp.url),
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "content_hash": content_hash,
+        }
+        if state is None:
+            self.db.add(ScrapeState(symbol=symbol, changed_at=datetime.utcnow(), **fields))
+            return True
+        if all(getattr(state, k) == v for k, v in fields.items()):
+            return False
+        if state.content_hash != content_hash:
+            state.changed_at = datetime.utcnow()
+        for key, value in fields.items():
+            setattr(state, key, value)
+        return True
+
+    async def _upsert_children(self, model, period_key: str, stock_id: str, rows: list[dict]):
+        """Insert or update all of a stock's rows for one child table in a single statement.
+
+        A value that is missing from the page keeps whatever was stored before.
+        """
+        if not rows:
+            return
+        columns = sorted({c for row in rows for c in row} - {period_key})
+        values = [
+            {"id": str(uuid.uuid4()), "stock_id": stock_id, period_key: row[period_key], **{c: row.get(c) for c in columns}}
+            for row in rows
+        ]
+        stmt = pg_insert(model).values(values)
+        conflict = ["stock_id", period_key]
+        if columns:
+            table = model.__table__
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict,
+                set_={c: func.coalesce(stmt.excluded[c], table.c[c]) for c in columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=conflict)
+        await self.db.execute(stmt)
+
+    async def _get(self, client: httpx.AsyncClient, url: str, headers: dict, mode: str) -> httpx.Response:
+        if self.rate_limiter:
+            await self.rate_limiter.acquire()
+        started = time.perf_counter()
+        resp = await client.get(url, headers=headers, extensions={"trace": _trace})
+        metrics.observe(f"scraper.fetch.{mode}", time.perf_counter() - started)
+        return resp
+
+    async def _fetch(
+        self, client: httpx.AsyncClient, symbol: str, mode: str, state: ScrapeState | None
+    ) -> httpx.Response:
         ua = random.choice(settings.scraper_user_agents)
         headers = {"User-Agent": ua}
-
-        async with httpx.AsyncClient(follow_redirects=True, timeout=30) as client:
-            resp = await client.get(url, headers=headers)
-            if resp.status_code == 404:
-                url = f"https://www.screener.in/company/{symbol}/"
-                resp = await client.get(url, headers=headers)
+        urls = [self.BASE_URL.format(symbol=symbol), f"https://www.screener.in/company/{symbol}/"]
+        if state:
+            if state.etag:
+                headers["If-None-Match"] = state.etag
+            if state.last_modified:
+                headers["If-Modified-Since"] = state.last_modified
+            # Go straight to the variant that worked last time instead of paying for the 404.
+            if state.url in urls:
+                urls.remove(state.url)
+                urls.insert(0, state.url)
+
+        for url in urls:
+            resp = await self._get(client, url, headers, mode)
+            if resp.status_code != 404:
+                break
+        if resp.status_code != 304:
             resp.raise_for_status()
+        return resp
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        data = self._parse_page(soup)
-
+    async def scrape_stock(self, symbol: str, force: bool = False) -> Stock:
         result = await self.db.execute(select(Stock).where(Stock.symbol == symbol))
         stock = result.scalar_one_or_none()
+        state_result = await self.db.execute(select(ScrapeState).where(ScrapeState.symbol == symbol))
+        state = state_result.scalar_one_or_none()
+        conditional_state = state if stock and not force else None
+
+        client = self.client
+        if client is None and settings.scraper_shared_client:
+            client = http_client.get_client()
+        if client is not None:
+            resp = await self._fetch(client, symbol, "shared", conditional_state)
+        else:
+            async with httpx.AsyncClient(follow_redirects=True, timeout=settings.scraper_timeout_seconds) as client:
+                resp = await self._fetch(client, symbol, "per_call", conditional_state)
 
+        if resp.status_code == 304:
+            self._record_outcome("not_modified")
+            # The page was checked and is current, so the stock counts as freshly scraped.
+            stock.last_scraped_at = datetime.utcnow()
+            await self.db.commit()
+            return stock
+
+        html = resp.text
+        content_hash = await run_cpu_bound(fingerprint_page, html)
+        if conditional_state and conditional_state.content_hash == content_hash:
+            self._record_outcome("unchanged")
+            stock.last_scraped_at = datetime.utcnow()
+            self._update_state(state, symbol, resp, content_hash)
+            await self.db.commit()
+            return stock
+
+        data = await run_cpu_bound(parse_page, html)
+
+        previous_price = stock.current_price if stock else None
         if stock:
             for key, value in data["ratios"].items():
                 if hasattr(stock, key) and value is not None:
@@ -49,182 +167,18 @@ class ScreenerScraper:
             )
             self.db.add(stock)
 
+        self._update_state(state, symbol, resp, content_hash)
+        self._record_outcome("refreshed")
         await self.db.flush()
 
-        for q in data.get("quarterly", []):
-            existing = await self.db.execute(
-                select(QuarterlyResult)
-                .where(QuarterlyResult.stock_id == stock.id, QuarterlyResult.quarter == q["quarter"])
-            )
-            if not existing.scalar_one_or_none():
-                self.db.add(QuarterlyResult(stock_id=stock.id, **q))
-
-        for a in data.get("annual", []):
-            existing = await self.db.execute(
-                select(AnnualResult)
-                .where(AnnualResult.stock_id == stock.id, AnnualResult.fiscal_year == a["fiscal_year"])
-            )
-            if not existing.scalar_one_or_none():
-                self.db.add(AnnualResult(stock_id=stock.id, **a))
-
-        for s in data.get("shareholding", []):
-            existing = await self.db.execute(
-                select(ShareholdingPattern)
-                .where(ShareholdingPattern.stock_id == stock.id, ShareholdingPattern.quarter == s["quarter"])
-            )
-            if not existing.scalar_one_or_none():
-                self.db.add(ShareholdingPattern(stock_id=stock.id, **s))
+        await self._upsert_children(QuarterlyResult, "quarter", stock.id, data.get("quarterly", []))
+        await self._upsert_children(AnnualResult, "fiscal_year", stock.id, data.get("annual", []))
+        await self._upsert_children(ShareholdingPattern, "quarter", stock.id, data.get("shareholding", []))
+        if stock.current_price != previous_price:
+            await portfolio_service.reprice_stock(self.db, stock.id, stock.current_price)
 
         await self.db.commit()
+        await stock_service.invalidate_stock(symbol)
+        if stock.current_price != previous_price:
+            await price_stream.publish_price(symbol, stock.current_price)
         return stock
-
-    def _parse_page(self, soup: BeautifulSoup) -> dict:
-        data = {"ratios": {}, "quarterly": [], "annual": [], "shareholding": []}
-
-        name_el = soup.select_one("h1")
-        if name_el:
-            data["ratios"]["name"] = name_el.get_text(strip=True)
-
-        ratios_list = soup.select("#top-ratios li")
-        ratio_map = {
-            "Market Cap": "market_cap", "Current Price": "current_price",
-            "Stock P/E": "pe_ratio", "Book Value": "book_value",
-            "Dividend Yield": "dividend_yield", "ROCE": "roce",
-            "ROE": "roe", "Face Value": "face_value",
-        }
-        for li in ratios_list:
-            name_el = li.select_one(".name")
-            val_el = li.select_one(".number")
-            if not name_el or not val_el:
-                continue
-            name = name_el.get_text(strip=True).rstrip(" ₹%")
-            val_text = val_el.get_text(strip=True).replace(",", "").replace("₹", "").strip()
-            if name == "High / Low" and "/" in val_text:
-                parts = val_text.split("/")
-                try:
-                    data["ratios"]["high_52w"] = float(parts[0].strip())
-                    data["ratios"]["low_52w"] = float(parts[1].strip())
-                except (ValueError, IndexError):
-                    pass
-                continue
-            attr = ratio_map.get(name)
-            if attr and val_text:
-                try:
-                    data["ratios"][attr] = float(val_text.replace("%", ""))
-                except ValueError:
-                    pass
-
-        pros_section = soup.select_one(".pros")
-        if pros_section:
-            items = [li.get_text(strip=True) for li in pros_section.select("li")]
-            data["pros"] = "\n".join(items) if items else None
-
-        cons_section = soup.select_one(".cons")
-        if cons_section:
-            items = [li.get_text(strip=True) for li in cons_section.select("li")]
-            data["cons"] = "\n".join(items) if items else None
-
-        about_section = soup.select_one(".about p")
-        if about_section:
-            data["about"] = about_section.get_text(strip=True)
-
-        quarters_section = soup.select_one("#quarters")
-        if quarters_section:
-            data["quarterly"] = self._parse_results_table(quarters_section, "quarter")
-
-        pl_section = soup.select_one("#profit-loss")
-        if pl_section:
-            data["annual"] = self._parse_annual_table(pl_section)
-
-        sh_section = soup.select_one("#shareholding")
-        if sh_section:
-            data["shareholding"] = self._parse_shareholding_table(sh_section)
-
-        return data
-
-    def _parse_results_table(self, section, period_key: str) -> list[dict]:
-        table = section.select_one("table")
-        if not table:
-            return []
-        headers = [th.get_text(strip=True) for th in table.select("thead th")]
-        rows = table.select("tbody tr")
-        field_map = {"Sales": "revenue", "Net Profit": "net_profit", "EPS": "eps", "OPM": "opm_percent"}
-        row_data: dict[str, dict] = {}
-        for row in rows:
-            cells = row.select("td")
-            if not cells:
-                continue
-            label = cells[0].get_text(strip=True)
-            field = field_map.get(label)
-            if not field:
-                continue
-            for i, cell in enumerate(cells[1:], 1):
-                if i >= len(headers):
-                    break
-                period = headers[i]
-                if period not in row_data:
-                    row_data[period] = {period_key: period}
-                val = cell.get_text(strip=True).replace(",", "").replace("%", "")
-                try:
-                    row_data[period][field] = float(val)
-                except ValueError:
-                    pass
-        return list(row_data.values())
-
-    def _parse_annual_table(self, section) -> list[dict]:
-        table = section.select_one("table")
-        if not table:
-            return []
-        headers = [th.get_text(strip=True) for th in table.select("thead th")]
-        rows = table.select("tbody tr")
-        field_map = {"Sales": "revenue", "Net Profit": "net_profit"}
-        row_data: dict[str, dict] = {}
-        for row in rows:
-            cells = row.select("td")
-            if not cells:
-                continue
-            label = cells[0].get_text(strip=True)
-            field = field_map.get(label)
-            if not field:
-                continue
-            for i, cell in enumerate(cells[1:], 1):
-                if i >= len(headers):
-                    break
-                fy = headers[i]
-                if fy not in row_data:
-                    row_data[fy] = {"fiscal_year": fy}
-                val = cell.get_text(strip=True).replace(",", "")
-                try:
-                    row_data[fy][field] = float(val)
-                except ValueError:
-                    pass
-        return list(row_data.values())
-
-    def _parse_shareholding_table(self, section) -> list[dict]:
-        table = section.select_one("table")
-        if not table:
-            return []
-        headers = [th.get_text(strip=True) for th in table.select("thead th")]
-        rows = table.select("tbody tr")
-        field_map = {"Promoters": "promoter_percent", "FIIs": "fii_percent", "DIIs": "dii_percent", "Public": "public_percent"}
-        row_data: dict[str, dict] = {}
-        for row in rows:
-            cells = row.select("td")
-            if not cells:
-                continue
-            label = cells[0].get_text(strip=True)
-            field = field_map.get(label)
-            if not field:
-                continue
-            for i, cell in enumerate(cells[1:], 1):
-                if i >= len(headers):
-                    break
-                q = headers[i]
-                if q not in row_data:
-                    row_data[q] = {"quarter": q}
-                val = cell.get_text(strip=True).replace(",", "").replace("%", "")
-                try:
-                    row_data[q][field] = float(val)
-                except ValueError:
-                    pass
-        return list(row_data.values())
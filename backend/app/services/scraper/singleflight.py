@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+from redis.exceptions import LockError, RedisError
+from app import metrics
+from app.config import settings
+from app.database import async_session
+from app.services.scraper.cache import get_redis
+from app.services.scraper.screener_scraper import ScreenerScraper
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def lock_key(symbol: str) -> str:
+    return f"scrape:lock:{symbol.upper()}"
+
+
+async def run_exclusive(symbol: str, scrape: Callable[[], Awaitable[T]]) -> T | None:
+    """Run ``scrape`` unless ``symbol`` is already being scraped, then wait for whichever scrape runs.
+
+    Callers in this process share one task; other API workers and Celery are
+    kept out by a Redis lock. Returns ``scrape``'s result, or ``None`` when the
+    scrape ran in another process (callers should reload from the DB).
+    """
+    symbol = symbol.upper()
+    task = _inflight.get(symbol)
+    if task is not None:
+        metrics.incr("scraper.singleflight.coalesced")
+    else:
+        task = asyncio.ensure_future(_run_locked(symbol, scrape))
+        _inflight[symbol] = task
+        task.add_done_callback(lambda _: _inflight.pop(symbol, None))
+    return await asyncio.shield(task)
+
+
+async def _run_locked(symbol: str, scrape: Callable[[], Awaitable[T]]) -> T | None:
+    r = await get_redis()
+    lock = r.lock(lock_key(symbol), timeout=settings.scrape_lock_timeout_seconds)
+    try:
+        acquired = await lock.acquire(blocking=False)
+    except RedisError as e:
+        # Without Redis we can still dedupe within this process.
+        logger.warning("Scrape lock unavailable for %s: %s", symbol, e)
+        return await scrape()
+
+    if not acquired:
+        metrics.incr("scraper.singleflight.waited_remote")
+        await _wait_for_release(r, lock_key(symbol))
+        return None
+
+    keeper = asyncio.ensure_future(_keep_lock(lock, symbol))
+    try:
+        return await scrape()
+    finally:
+        keeper.cancel()
+        try:
+            await lock.release()
+        except (LockError, RedisError) as e:
+            logger.warning("Failed to release scrape lock for %s: %s", symbol, e)
+
+
+async def _keep_lock(lock, symbol: str):
+    # A scrape can outlast the lock's TTL (two fetches of up to scraper_timeout_seconds each, plus rate limiting),
+    # so the holder resets it while the scrape runs; the TTL only bounds how long a dead holder blocks others.
+    while True:
+        await asyncio.sleep(settings.scrape_lock_timeout_seconds / 3)
+        try:
+            await lock.reacquire()
+        except (LockError, RedisError) as e:
+            metrics.incr("scraper.singleflight.lock_lost")
+            logger.warning("Could not extend scrape lock for %s: %s", symbol, e)
+            return
+
+
+async def _wait_for_release(r, key: str, poll_seconds: float = 0.25):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.scrape_wait_timeout_seconds
+    while loop.time() < deadline:
+        try:
+            if not await r.exists(key):
+                return
+        except RedisError:
+            return
+        await asyncio.sleep(poll_seconds)
+    raise TimeoutError(f"Timed out waiting for another scrape of {key}")
+
+
+async def scrape_symbol(symbol: str, force: bool = False) -> str | None:
+    """Scrape ``symbol`` in its own session with single-flight; returns the scrape outcome."""
+    async def scrape() -> str | None:
+        async with async_session() as db:
+            scraper = ScreenerScraper(db)
+            await scraper.scrape_stock(symbol.upper(), force=force)
+            return scraper.last_outcome
+
+    return await run_exclusive(symbol, scrape)
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import numpy as np
+from sqlalchemy import select
+from app import metrics
+from app.config import settings
+from app.database import async_session
+from app.models.stock import Stock
+from app.schemas.stock import StockListItem
+
+logger = logging.getLogger(__name__)
+
+# Columns held as float64 arrays (NaN for NULL); the snapshot filters and sorts on these only.
+NUMERIC_COLUMNS = (
+    "market_cap", "current_price", "pe_ratio", "pb_ratio", "dividend_yield", "roce", "roe",
+    "debt_to_equity", "eps", "promoter_holding", "sales_growth_3y", "profit_growth_3y",
+)
+
+RANGE_FILTERS = {
+    "min_pe": ("pe_ratio", np.greater_equal),
+    "max_pe": ("pe_ratio", np.less_equal),
+    "min_roce": ("roce", np.greater_equal),
+    "min_roe": ("roe", np.greater_equal),
+    "min_market_cap": ("market_cap", np.greater_equal),
+    "max_debt_to_equity": ("debt_to_equity", np.less_equal),
+}
+
+ITEM_FIELDS = tuple(StockListItem.model_fields)
+
+
+@dataclass
+class ScreenerSnapshot:
+    generation: int
+    built_at: float
+    items: list[dict]
+    id_rank: np.ndarray
+    sectors: np.ndarray
+    columns: dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def is_fresh(self, generation: int) -> bool:
+        return self.generation == generation and time.monotonic() - self.built_at < settings.screener_index_max_age_seconds
+
+    def value(self, column: str, row: int) -> float | None:
+        value = self.columns[column][row]
+        return None if np.isnan(value) else float(value)
+
+    def select(self, sort_by: str, descending: bool, offset: int, limit: int, **filters) -> tuple[np.ndarray, int]:
+        """Row numbers for one page, ordered like the SQL path (NULLS LAST, id tiebreak), and the match count."""
+        mask = np.ones(len(self), dtype=bool)
+        if filters.get("sector"):
+            mask &= self.sectors == filters["sector"]
+        for param, (column, op) in RANGE_FILTERS.items():
+            if filters.get(param) is not None:
+                # Comparisons against NaN are False, matching SQL where NULL never passes a range filter.
+                mask &= op(self.columns[column], filters[param])
+        rows = np.flatnonzero(mask)
+
+        values = self.columns[sort_by][rows]
+        id_rank = self.id_rank[rows]
+        if descending:
+            order = np.lexsort((-id_rank, -values, np.isnan(values)))
+        else:
+            order = np.lexsort((id_rank, values, np.isnan(values)))
+        return rows[order[offset:offset + limit]], len(rows)
+
+
+async def build_snapshot(generation: int) -> ScreenerSnapshot:
+    item_columns = [getattr(Stock, f) for f in ITEM_FIELDS]
+    extra = [c for c in NUMERIC_COLUMNS if c not in ITEM_FIELDS]
+    async with async_session() as db:
+        result = await db.execute(select(*item_columns, *(getattr(Stock, c) for c in extra)))
+        rows = result.all()
+
+    with metrics.timed("screener_index.build"):
+        items = [dict(zip(ITEM_FIELDS, row[:len(ITEM_FIELDS)])) for row in rows]
+        raw = {f: [row[i] for row in rows] for i, f in enumerate((*ITEM_FIELDS, *extra))}
+        columns = {c: np.array(raw[c], dtype=np.float64) for c in NUMERIC_COLUMNS}
+        id_rank = np.empty(len(rows), dtype=np.int64)
+        id_rank[np.argsort(np.array(raw["id"], dtype=str), kind="stable")] = np.arange(len(rows))
+        sectors = np.array(raw["sector"], dtype=object)
+    return ScreenerSnapshot(generation, time.monotonic(), items, id_rank, sectors, columns)
+
+
+_snapshot: ScreenerSnapshot | None = None
+_rebuild: asyncio.Task | None = None
+_last_build = 0.0
+
+
+def current(generation: int) -> ScreenerSnapshot | None:
+    """The snapshot if it reflects ``generation`` and is within its max age, else None."""
+    if not settings.screener_index_enabled:
+        return None
+    if _snapshot is not None and _snapshot.is_fresh(generation):
+        return _snapshot
+    metrics.incr("screener_index.stale")
+    return None
+
+
+def schedule_rebuild(get_generation: Callable[[], Awaitable[int]]):
+    global _rebuild
+    if settings.screener_index_enabled and (_rebuild is None or _rebuild.done()):
+        _rebuild = asyncio.create_task(_rebuild_snapshot(get_generation))
+
+
+async def _rebuild_snapshot(get_generation: Callable[[], Awaitable[int]]):
+    global _snapshot, _last_build
+    # A bulk refresh bumps the generation once per stock; rebuilding at most this often keeps it from thrashing.
+    delay = _last_build + settings.screener_index_min_rebuild_seconds - time.monotonic()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    _last_build = time.monotonic()
+    try:
+        # Read before loading rows, so a scrape landing mid-build leaves the snapshot stale rather than wrong.
+        generation = await get_generation()
+        _snapshot = await build_snapshot(generation)
+        logger.info("Screener index rebuilt: %d stocks at generation %d", len(_snapshot), generation)
+    except Exception as e:
+        metrics.incr("screener_index.build_error")
+        logger.warning("Screener index rebuild failed: %s", e)
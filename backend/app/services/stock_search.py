@@ -0,0 +1,57 @@
+import logging
+from sqlalchemy import case, or_, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import metrics
+from app.config import settings
+from app.models.stock import Stock
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE for a statement cancelled by statement_timeout.
+QUERY_CANCELED = "57014"
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_condition(term: str):
+    """Substring match on symbol or name; served by the pg_trgm GIN indexes from migration 0003."""
+    pattern = f"%{escape_like(term)}%"
+    return or_(Stock.symbol.ilike(pattern, escape="\\"), Stock.name.ilike(pattern, escape="\\"))
+
+
+def relevance(term: str):
+    """Lower is better: exact symbol, symbol prefix, name prefix, name word prefix, anything else."""
+    escaped = escape_like(term)
+    return case(
+        (Stock.symbol == term.upper(), 0),
+        (Stock.symbol.ilike(f"{escaped}%", escape="\\"), 1),
+        (Stock.name.ilike(f"{escaped}%", escape="\\"), 2),
+        (Stock.name.ilike(f"% {escaped}%", escape="\\"), 3),
+        else_=4,
+    )
+
+
+async def query_typeahead(db: AsyncSession, term: str, limit: int) -> list[dict] | None:
+    """Best matches for ``term`` as symbol/name pairs, or None if the statement timeout cut it short."""
+    query = (
+        select(Stock.symbol, Stock.name)
+        .where(search_condition(term))
+        .order_by(relevance(term), Stock.market_cap.desc().nullslast(), Stock.symbol)
+        .limit(limit)
+    )
+    try:
+        # SET LOCAL only lasts for this transaction, so the budget never leaks to other queries on the session.
+        await db.execute(text(f"SET LOCAL statement_timeout = {int(settings.stock_typeahead_timeout_ms)}"))
+        result = await db.execute(query)
+        return [{"symbol": symbol, "name": name} for symbol, name in result.all()]
+    except DBAPIError as e:
+        if getattr(e.orig, "sqlstate", None) != QUERY_CANCELED:
+            metrics.incr("stock_search.typeahead.error")
+            raise
+        await db.rollback()
+        metrics.incr("stock_search.typeahead.timeout")
+        logger.warning("Typeahead for %r gave up: %s", term, e.orig)
+        return None
@@ -0,0 +1,309 @@
+import base64
+import hashlib
+import json
+from sqlalchemy import String, select, func, or_, and_, tuple_, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app import metrics
+from app.config import settings
+from app.database import async_session
+from app.models.stock import Stock
+from app.schemas.stock import StockDetail, StockListItem, StockListResponse
+from app.services import screener_index, stock_search
+from app.services.scraper.cache import delete_cached, get_counter, get_or_compute, incr_counter, publish_invalidation
+
+# Bumped on every scrape so list pages cached before it are never read again.
+LIST_GENERATION_KEY = "stock:list:gen"
+
+
+def detail_key(symbol: str) -> str:
+    return f"stock:detail:{symbol.upper()}"
+
+
+def list_key(params: dict, generation: int) -> str:
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f"stock:list:{generation}:{digest}"
+
+
+def normalize_list_params(**params) -> dict:
+    normalized = {k: v for k, v in params.items() if v is not None}
+    if "search" in normalized:
+        normalized["search"] = normalized["search"].strip().lower()
+    if "sort_order" in normalized:
+        normalized["sort_order"] = normalized["sort_order"].lower()
+    return normalized
+
+
+async def load_stock_detail(symbol: str, db: AsyncSession) -> Stock | None:
+    result = await db.execute(
+        select(Stock)
+        .where(Stock.symbol == symbol.upper())
+        .options(
+            selectinload(Stock.quarterly_results),
+            selectinload(Stock.annual_results),
+            selectinload(Stock.shareholding_patterns),
+            selectinload(Stock.peers),
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_stock_detail(symbol: str) -> StockDetail | None:
+    # Loaders open their own session: a coalesced load outlives the request that started it.
+    async def load() -> dict | None:
+        with metrics.timed("stock_service.detail.load"):
+            async with async_session() as db:
+                stock = await load_stock_detail(symbol, db)
+                return StockDetail.model_validate(stock).model_dump(mode="json") if stock else None
+
+    data = await get_or_compute(detail_key(symbol), load, settings.stock_detail_cache_ttl_seconds, "stock_detail")
+    return StockDetail.model_validate(data) if data is not None else None
+
+
+FILTER_PARAMS = ("search", "sector", "min_pe", "max_pe", "min_roce", "min_roe", "min_market_cap", "max_debt_to_equity")
+
+SORTABLE_COLUMNS = {
+    "symbol", "name", "sector", "market_cap", "current_price", "pe_ratio", "pb_ratio", "dividend_yield",
+    "roce", "roe", "debt_to_equity", "eps", "promoter_holding", "sales_growth_3y", "profit_growth_3y",
+}
+
+
+def filter_stocks(
+    query,
+    search: str | None = None,
+    sector: str | None = None,
+    min_pe: float | None = None,
+    max_pe: float | None = None,
+    min_roce: float | None = None,
+    min_roe: float | None = None,
+    min_market_cap: float | None = None,
+    max_debt_to_equity: float | None = None,
+):
+    if search:
+        query = query.where(stock_search.search_condition(search))
+    if sector:
+        query = query.where(Stock.sector == sector)
+    if min_pe is not None:
+        query = query.where(Stock.pe_ratio >= min_pe)
+    if max_pe is not None:
+        query = query.where(Stock.pe_ratio <= max_pe)
+    if min_roce is not None:
+        query = query.where(Stock.roce >= min_roce)
+    if min_roe is not None:
+        query = query.where(Stock.roe >= min_roe)
+    if min_market_cap is not None:
+        query = query.where(Stock.market_cap >= min_market_cap)
+    if max_debt_to_equity is not None:
+        query = query.where(Stock.debt_to_equity <= max_debt_to_equity)
+    return query
+
+
+def encode_cursor(sort_key: str, descending: bool, value, stock_id: str) -> str:
+    payload = [sort_key, "desc" if descending else "asc", value, stock_id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_col, descending: bool) -> tuple:
+    """The (value, id) a cursor resumes after, checked against the ordering it is used with."""
+    try:
+        sort_key, order, value, stock_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if sort_key != sort_col.key or order != ("desc" if descending else "asc"):
+        raise ValueError("Cursor belongs to a different sort; start again from the first page")
+    # The value is compared with the column in SQL, where a type mismatch would be a database error.
+    expected = str if isinstance(sort_col.type, String) else (int, float)
+    if not isinstance(stock_id, str) or (value is not None and (isinstance(value, bool) or not isinstance(value, expected))):
+        raise ValueError("Invalid cursor")
+    return value, stock_id
+
+
+def _after_cursor(sort_col, descending: bool, value, last_id: str):
+    """Rows that come after (value, last_id) in ``sort_col`` NULLS LAST, id order."""
+    if value is None:
+        return and_(sort_col.is_(None), Stock.id < last_id if descending else Stock.id > last_id)
+    key, bound = tuple_(sort_col, Stock.id), tuple_(literal(value), literal(last_id))
+    return or_(key < bound if descending else key > bound, sort_col.is_(None))
+
+
+async def count_stocks(filters: dict) -> int:
+    """Total rows matching ``filters``, cached until the next scrape."""
+    async def load() -> dict:
+        async with async_session() as db:
+            result = await db.execute(select(func.count()).select_from(filter_stocks(select(Stock.id), **filters).subquery()))
+        return {"total": result.scalar() or 0}
+
+    generation = await get_counter(LIST_GENERATION_KEY)
+    key = "stock:count:" + list_key(filters, generation).removeprefix("stock:list:")
+    data = await get_or_compute(key, load, settings.stock_list_cache_ttl_seconds, "stock_count")
+    return data["total"]
+
+
+def sort_column(sort_by: str | None):
+    return getattr(Stock, sort_by) if sort_by in SORTABLE_COLUMNS else Stock.market_cap
+
+
+def list_query(
+    page: int = 1,
+    page_size: int = 20,
+    sort_by: str | None = None,
+    sort_order: str = "desc",
+    cursor: str | None = None,
+    with_total: bool = True,
+    **filters,
+):
+    """The SELECT behind ``query_stocks``; fetches one extra row to detect a next page.
+
+    Searches without an explicit ``sort_by`` are ordered by relevance, which
+    only supports offset pages.
+    """
+    sort_col = sort_column(sort_by)
+    descending = sort_order != "asc"
+    order = [(sort_col.desc() if descending else sort_col.asc()).nullslast()]
+    tiebreak = Stock.id.desc() if descending else Stock.id.asc()
+    if filters.get("search") and sort_by is None:
+        if cursor:
+            raise ValueError("Cursor pagination needs an explicit sort_by when searching")
+        order.insert(0, stock_search.relevance(filters["search"]))
+
+    columns = [Stock, func.count().over().label("total")] if with_total and cursor is None else [Stock]
+    query = filter_stocks(select(*columns), **filters).order_by(*order, tiebreak)
+    if cursor:
+        query = query.where(_after_cursor(sort_col, descending, *decode_cursor(cursor, sort_col, descending)))
+    else:
+        query = query.offset((page - 1) * page_size)
+    return query.limit(page_size + 1)
+
+
+async def query_stocks(
+    db: AsyncSession,
+    page: int = 1,
+    page_size: int = 20,
+    sort_by: str | None = None,
+    sort_order: str = "desc",
+    cursor: str | None = None,
+    with_total: bool = True,
+    **filters,
+) -> StockListResponse:
+    """One page of stocks matching ``filters`` (see ``FILTER_PARAMS``).
+
+    Pages are addressed by ``cursor`` (keyset on the sort column plus id) when
+    given, otherwise by ``page``. Offset pages get their total from a window
+    count in the same query; cursor pages use the cached ``count_stocks``.
+    """
+    sort_col = sort_column(sort_by)
+    window_total = with_total and cursor is None
+    query = list_query(page, page_size, sort_by, sort_order, cursor, with_total, **filters)
+    result = await db.execute(query)
+    rows = result.all()
+
+    has_more = len(rows) > page_size and not (filters.get("search") and sort_by is None)
+    rows = rows[:page_size]
+    stocks = [row[0] for row in rows]
+
+    total = None
+    if window_total and rows:
+        total = rows[0].total
+    elif with_total:
+        # Cursor pages, and offset pages past the end where the window count has no row to ride on.
+        total = await count_stocks(filters)
+
+    next_cursor = None
+    if has_more:
+        last = stocks[-1]
+        next_cursor = encode_cursor(sort_col.key, sort_order != "asc", getattr(last, sort_col.key), last.id)
+
+    return StockListResponse(
+        items=[StockListItem.model_validate(s) for s in stocks],
+        total=total,
+        page=page,
+        page_size=page_size,
+        next_cursor=next_cursor,
+    )
+
+
+def query_snapshot(
+    snapshot: screener_index.ScreenerSnapshot,
+    page: int = 1,
+    page_size: int = 20,
+    sort_by: str | None = None,
+    sort_order: str = "desc",
+    cursor: str | None = None,
+    with_total: bool = True,
+    **filters,
+) -> StockListResponse | None:
+    """``query_stocks`` answered from the in-memory screener index, or None if it needs SQL.
+
+    Search, cursor pages and text sort columns always go to SQL.
+    """
+    sort_by = sort_by or "market_cap"
+    if cursor or filters.get("search") or sort_by not in screener_index.NUMERIC_COLUMNS:
+        return None
+    rows, total = snapshot.select(sort_by, sort_order != "asc", (page - 1) * page_size, page_size + 1, **filters)
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_by, sort_order != "asc", snapshot.value(sort_by, last), snapshot.items[last]["id"])
+    return StockListResponse(
+        items=[snapshot.items[i] for i in rows],
+        total=total if with_total else None,
+        page=page,
+        page_size=page_size,
+        next_cursor=next_cursor,
+    )
+
+
+async def current_generation() -> int:
+    return await get_counter(LIST_GENERATION_KEY)
+
+
+async def list_stocks(params: dict) -> StockListResponse:
+    """Screener index first, then a read-through cache around ``query_stocks``.
+
+    ``params`` must come from ``normalize_list_params``.
+    """
+    generation = await current_generation()
+    snapshot = screener_index.current(generation)
+    if snapshot is None:
+        screener_index.schedule_rebuild(current_generation)
+    else:
+        with metrics.timed("stock_service.list.snapshot"):
+            response = query_snapshot(snapshot, **params)
+        if response is not None:
+            metrics.incr("screener_index.hit")
+            return response
+
+    async def load() -> dict:
+        with metrics.timed("stock_service.list.load"):
+            async with async_session() as db:
+                response = await query_stocks(db, **params)
+        return response.model_dump(mode="json")
+
+    key = list_key(params, generation)
+    data = await get_or_compute(key, load, settings.stock_list_cache_ttl_seconds, "stock_list")
+    return StockListResponse.model_validate(data)
+
+
+async def typeahead(term: str, limit: int = 8) -> list[dict]:
+    term = term.strip().lower()
+    if not term:
+        return []
+
+    async def load() -> dict | None:
+        with metrics.timed("stock_service.typeahead.load"):
+            async with async_session() as db:
+                items = await stock_search.query_typeahead(db, term, limit)
+        return {"items": items} if items is not None else None
+
+    key = f"stock:typeahead:{await get_counter(LIST_GENERATION_KEY)}:{limit}:{term}"
+    data = await get_or_compute(key, load, settings.stock_list_cache_ttl_seconds, "stock_typeahead")
+    return data["items"] if data is not None else []
+
+
+async def invalidate_stock(symbol: str):
+    key = detail_key(symbol)
+    await incr_counter(LIST_GENERATION_KEY)
+    await delete_cached(key)
+    # The generation counter is evicted locally everywhere so workers pick up the new value.
+    await publish_invalidation(key, LIST_GENERATION_KEY)
@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+import numpy as np
+from sqlalchemy import String, case, exists, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import metrics
+from app.models.portfolio import Holding, RealizedGain
+from app.models.stock import Stock
+from app.models.tax_harvest import TaxHarvestRecommendation
+from app.services import portfolio_service
+from app.services.cost_basis import LotBook, is_short_term, long_term_cutoff
+
+STCG_TAX_RATE = 0.15
+LTCG_TAX_RATE = 0.10
+
+
+@dataclass
+class Harvest:
+    holding_id: np.ndarray
+    unrealized_loss: np.ndarray
+    estimated_tax_saving: np.ndarray
+    is_short_term: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.holding_id)
+
+
+def find_harvestable(lots: LotBook, today: date, exclude: set[str] = frozenset()) -> Harvest:
+    """Lots trading below cost, classified STCG/LTCG by holding period, minus ``exclude``."""
+    with np.errstate(invalid="ignore"):
+        pnl = lots.unrealized_gain()
+        # NaN (unpriced) and zero prices are skipped, as a missing price is not a loss.
+        mask = (lots.current_price > 0) & (pnl < 0)
+    if exclude:
+        mask &= ~np.isin(lots.holding_id, list(exclude))
+
+    loss = -pnl[mask]
+    short_term = is_short_term(lots.buy_date[mask], today)
+    return Harvest(
+        holding_id=lots.holding_id[mask],
+        unrealized_loss=loss,
+        estimated_tax_saving=loss * np.where(short_term, STCG_TAX_RATE, LTCG_TAX_RATE),
+        is_short_term=short_term,
+    )
+
+
+async def pending_holding_ids(db: AsyncSession, user_id: str) -> set[str]:
+    result = await db.execute(
+        select(TaxHarvestRecommendation.holding_id).where(
+            TaxHarvestRecommendation.user_id == user_id,
+            TaxHarvestRecommendation.status == "pending",
+        )
+    )
+    return set(result.scalars().all())
+
+
+def financial_year_start(on: date) -> date:
+    return date(on.year if on.month >= 4 else on.year - 1, 4, 1)
+
+
+async def realized_gains(db: AsyncSession, user_id: str, today: date | None = None) -> tuple[float, float]:
+    """Short- and long-term gains realized so far this financial year, which harvested losses can offset."""
+    today = today or date.today()
+    result = await db.execute(
+        select(
+            func.coalesce(func.sum(RealizedGain.gain).filter(RealizedGain.is_short_term), 0.0),
+            func.coalesce(func.sum(RealizedGain.gain).filter(~RealizedGain.is_short_term), 0.0),
+        ).where(RealizedGain.user_id == user_id, RealizedGain.sell_date >= financial_year_start(today))
+    )
+    stcg, ltcg = result.one()
+    return stcg, ltcg
+
+
+async def analyze(db: AsyncSession, user_id: str, today: date | None = None) -> int:
+    """Create pending recommendations for the user's losing lots that don't have one yet."""
+    lots = await portfolio_service.lot_book(db, user_id)
+    pending = await pending_holding_ids(db, user_id)
+    with metrics.timed("tax_harvest.compute"):
+        harvest = find_harvestable(lots, today or date.today(), pending)
+    if len(harvest):
+        await db.execute(insert(TaxHarvestRecommendation), [
+            {
+                "user_id": user_id,
+                "holding_id": holding_id,
+                "unrealized_loss": float(loss),
+                "estimated_tax_saving": float(saving),
+                "is_short_term": bool(short),
+            }
+            for holding_id, loss, saving, short in zip(
+                harvest.holding_id, harvest.unrealized_loss, harvest.estimated_tax_saving, harvest.is_short_term,
+            )
+        ])
+    await db.commit()
+    return len(harvest)
+
+
+def batch_insert(user_ids: list[str], today: date):
+    """INSERT ... SELECT of ``find_harvestable`` for many users at once, computed in Postgres."""
+    short_term = Holding.buy_date > long_term_cutoff(today)
+    loss = Holding.quantity * (Holding.buy_price - Stock.current_price)
+    pending = exists().where(
+        TaxHarvestRecommendation.holding_id == Holding.id,
+        TaxHarvestRecommendation.status == "pending",
+    )
+    rows = (
+        select(
+            func.gen_random_uuid().cast(String),
+            Holding.user_id,
+            Holding.id,
+            loss,
+            loss * case((short_term, STCG_TAX_RATE), else_=LTCG_TAX_RATE),
+            short_term,
+            literal("pending"),
+            literal(datetime.utcnow()),
+        )
+        .join(Stock, Stock.id == Holding.stock_id)
+        .where(
+            Holding.user_id.in_(user_ids),
+            Stock.current_price > 0,
+            Stock.current_price < Holding.buy_price,
+            ~pending,
+        )
+    )
+    t = TaxHarvestRecommendation.__table__.c
+    return insert(TaxHarvestRecommendation).from_select(
+        [t.id, t.user_id, t.holding_id, t.unrealized_loss, t.estimated_tax_saving, t.is_short_term, t.status, t.created_at],
+        rows,
+    )
@@ -0,0 +1,7 @@
+from app.services import cas_import
+from app.tasks.celery_app import celery, run_async
+
+
+@celery.task(name="app.tasks.cas_ingest.ingest_cas")
+def ingest_cas(upload_id: str, sealed_password: str | None = None):
+    run_async(cas_import.ingest(upload_id, sealed_password))
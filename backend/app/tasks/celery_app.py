@@ -1,6 +1,10 @@
+import asyncio
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
 from app.config import settings
+from app.services import cpu_pool
+from app.services.scraper import http_client
 
 celery = Celery("ekphrasis", broker=settings.redis_url, backend=settings.redis_url)
 celery.conf.update(
@@ -12,10 +16,46 @@ celery.conf.update(
 )
 
 celery.conf.beat_schedule = {
+    # Queues the tax-harvest analysis when it finishes, so losses are measured against fresh prices.
     "refresh-top-stocks-nightly": {
         "task": "app.tasks.scrape_stocks.refresh_top_stocks",
         "schedule": crontab(hour=1, minute=0),
     },
+    # AMFI publishes the day's NAVs late in the evening.
+    "amfi-nav-nightly": {
+        "task": "app.tasks.mf_nav.refresh_navs",
+        "schedule": crontab(hour=23, minute=30),
+    },
 }
 
-celery.autodiscover_tasks(["app.tasks"])
+# autodiscover_tasks(["app.tasks"]) only looks for an app.tasks.tasks module, so list the task modules.
+celery.conf.include = ["app.tasks.scrape_stocks", "app.tasks.tax_harvest", "app.tasks.cas_ingest", "app.tasks.mf_nav"]
+
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def run_async(coro):
+    """Run a coroutine on this worker process's long-lived event loop.
+
+    ``asyncio.run`` would create and close a loop per task, which breaks the
+    shared HTTP client and the asyncpg pool since both are bound to the loop
+    they were created on.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+@worker_process_init.connect
+def _open_worker_resources(**kwargs):
+    # Celery already runs one process per core, so parsing stays in-process on threads by default.
+    cpu_pool.start_pool(kind=settings.celery_cpu_pool_kind)
+    run_async(http_client.open_client())
+
+
+@worker_process_shutdown.connect
+def _close_worker_resources(**kwargs):
+    run_async(http_client.close_client())
+    cpu_pool.shutdown_pool()
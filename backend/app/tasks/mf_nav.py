@@ -0,0 +1,41 @@
+from app.database import async_session
+from app.services import amfi_nav, mf_analyzer, nav_returns
+from app.tasks.celery_app import celery, run_async
+
+
+@celery.task(name="app.tasks.mf_nav.refresh_navs")
+def refresh_navs(source: str | None = None):
+    """Ingest AMFI's daily NAV file; ``source`` may be a URL or a local NAVAll.txt."""
+    run_async(_refresh_navs(source))
+
+
+async def _refresh_navs(source: str | None = None):
+    async with async_session() as db:
+        summary = await amfi_nav.ingest_nav(db, source)
+        # Ratings rank schemes on their returns, so returns are refreshed first.
+        returns = await nav_returns.refresh_returns(db)
+        stats = await mf_analyzer.refresh_category_stats(db)
+    print(
+        f"Ingested {summary['schemes']} scheme NAVs in {summary['batches']} batches "
+        f"in {summary['seconds']:.1f}s ({summary['skipped_lines']} lines skipped)"
+    )
+    print(
+        f"Computed returns for {returns['schemes']} schemes over {returns['points']} NAVs in {returns['seconds']:.1f}s "
+        f"(load {returns['load_seconds']:.1f}s, compute {returns['compute_seconds']:.1f}s)"
+    )
+    print(f"Rated {stats['rated']}/{stats['schemes']} schemes across {stats['groups']} categories in {stats['seconds']:.1f}s")
+
+
+@celery.task(name="app.tasks.mf_nav.backfill_nav_history")
+def backfill_nav_history(source: str):
+    """Load an AMFI historical NAV report (URL or local file) into the NAV history."""
+    run_async(_backfill_nav_history(source))
+
+
+async def _backfill_nav_history(source: str):
+    async with async_session() as db:
+        summary = await amfi_nav.backfill_history(db, source)
+    print(
+        f"Backfilled {summary['navs']} NAVs in {summary['seconds']:.1f}s "
+        f"({summary['unknown_schemes']} schemes not in mf_schemes skipped)"
+    )
@@ -1,16 +1,19 @@
-import asyncio
-import time
-from app.tasks.celery_app import celery
+from app import metrics
+from app.tasks.celery_app import celery, run_async
 from app.database import async_session
-from app.services.scraper.screener_scraper import ScreenerScraper
+from app.services.scraper.bulk import BulkScraper
+from app.services import scrape_jobs
+from app.services.scraper import singleflight
 from app.models.stock import Stock
 from sqlalchemy import select
-from app.config import settings
 
 
 @celery.task(name="app.tasks.scrape_stocks.refresh_top_stocks")
-def refresh_top_stocks():
-    asyncio.run(_refresh_top_stocks())
+def refresh_top_stocks(analyze: bool = True):
+    run_async(_refresh_top_stocks())
+    if analyze:
+        # Chained here rather than scheduled at a fixed offset: a rate-limited refresh has no fixed duration.
+        celery.send_task("app.tasks.tax_harvest.analyze_all_users")
 
 
 async def _refresh_top_stocks():
@@ -23,22 +26,40 @@ async def _refresh_top_stocks():
         )
         symbols = [row[0] for row in result.all()]
 
-    for symbol in symbols:
-        try:
-            async with async_session() as db:
-                scraper = ScreenerScraper(db)
-                await scraper.scrape_stock(symbol)
-            time.sleep(settings.scraper_rate_limit_seconds)
-        except Exception as e:
-            print(f"Error scraping {symbol}: {e}")
+    outcome = await BulkScraper().run(symbols)
+    for symbol, error in outcome.failed.items():
+        print(f"Error scraping {symbol}: {error}")
+    print(
+        f"Refreshed {len(outcome.succeeded)}/{len(symbols)} stocks "
+        f"in {outcome.elapsed_seconds:.1f}s ({len(outcome.failed)} failed, outcomes={outcome.outcomes})"
+    )
+    print(f"Scraper fetch metrics: {metrics.snapshot('scraper.')}")
 
 
-@celery.task(name="app.tasks.scrape_stocks.scrape_single_stock")
-def scrape_single_stock(symbol: str):
-    asyncio.run(_scrape_single(symbol))
+@celery.task(name="app.tasks.scrape_stocks.scrape_single_stock", bind=True)
+def scrape_single_stock(self, symbol: str, force: bool = False):
+    run_async(_scrape_single(symbol, force, self.request.id))
 
 
-async def _scrape_single(symbol: str):
+async def _scrape_single(symbol: str, force: bool = False, job_id: str | None = None):
+    if job_id:
+        await scrape_jobs.update_job(job_id, "running")
+    try:
+        outcome = await singleflight.scrape_symbol(symbol, force=force)
+    except Exception as e:
+        if job_id:
+            await scrape_jobs.update_job(job_id, "failed", str(e) or type(e).__name__)
+        raise
+    if not job_id:
+        return
+    # None means another process ran the scrape; we only saw its lock go away, not whether it succeeded.
+    if outcome is None and not await _stock_exists(symbol):
+        await scrape_jobs.update_job(job_id, "failed", f"Scrape of {symbol.upper()} in another worker did not save it")
+        return
+    await scrape_jobs.update_job(job_id, "success")
+
+
+async def _stock_exists(symbol: str) -> bool:
     async with async_session() as db:
-        scraper = ScreenerScraper(db)
-        await scraper.scrape_stock(symbol)
+        result = await db.execute(select(Stock.id).where(Stock.symbol == symbol.upper()))
+        return result.first() is not None
@@ -0,0 +1,53 @@
+import asyncio
+import time
+from datetime import date
+from sqlalchemy import distinct, select
+from app import metrics
+from app.config import settings
+from app.database import async_session
+from app.models.portfolio import Holding
+from app.services.tax_harvest_engine import batch_insert
+from app.tasks.celery_app import celery, run_async
+
+
+@celery.task(name="app.tasks.tax_harvest.analyze_all_users")
+def analyze_all_users():
+    run_async(_analyze_all_users())
+
+
+async def _analyze_batch(number: int, user_ids: list[str], today: date, limit: asyncio.Semaphore) -> int:
+    async with limit:
+        started = time.perf_counter()
+        # Each batch commits on its own connection, so a failure only loses that batch.
+        async with async_session() as db:
+            result = await db.execute(batch_insert(user_ids, today))
+            await db.commit()
+        elapsed = time.perf_counter() - started
+    metrics.observe("tax_harvest.batch", elapsed)
+    print(f"Tax harvest batch {number}: {len(user_ids)} users, {result.rowcount} recommendations in {elapsed * 1000:.0f}ms")
+    return result.rowcount
+
+
+async def _analyze_all_users():
+    started = time.perf_counter()
+    async with async_session() as db:
+        result = await db.execute(select(distinct(Holding.user_id)).order_by(Holding.user_id))
+        user_ids = list(result.scalars().all())
+
+    size = settings.tax_harvest_batch_size
+    batches = [user_ids[i:i + size] for i in range(0, len(user_ids), size)]
+    limit = asyncio.Semaphore(settings.tax_harvest_batch_concurrency)
+    today = date.today()
+    outcomes = await asyncio.gather(
+        *(_analyze_batch(n, batch, today, limit) for n, batch in enumerate(batches, 1)),
+        return_exceptions=True,
+    )
+
+    failed = [(n, e) for n, e in enumerate(outcomes, 1) if isinstance(e, Exception)]
+    for n, error in failed:
+        print(f"Tax harvest batch {n} failed: {error}")
+    created = sum(o for o in outcomes if not isinstance(o, Exception))
+    print(
+        f"Tax harvest analysed {len(user_ids)} users in {len(batches)} batches "
+        f"in {time.perf_counter() - started:.1f}s: {created} recommendations created, {len(failed)} batches failed"
+    )
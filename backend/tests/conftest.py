@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the app the same way the scripts do, with backend/ on the path.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -6,7 +6,7 @@ export default function MFUploader() {
   const upload = useUploadCAS()
 
   const onDrop = useCallback((files: File[]) => {
-    if (files[0]) upload.mutate(files[0])
+    if (files[0]) upload.mutate({ file: files[0] })
   }, [upload])
 
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
@@ -22,19 +22,30 @@ export function useMFAnalysis() {
   })
 }
 
+async function waitForCASUpload(uploadId: string) {
+  for (;;) {
+    const { data } = await api.get(`/mutual-funds/cas-uploads/${uploadId}`)
+    if (data.status === 'done') return data
+    if (data.status === 'failed') throw new Error(data.error || 'CAS import failed')
+    await new Promise((resolve) => setTimeout(resolve, 1000))
+  }
+}
+
 export function useUploadCAS() {
   const qc = useQueryClient()
   return useMutation({
-    mutationFn: (file: File) => {
+    mutationFn: async ({ file, password }: { file: File; password?: string }) => {
       const formData = new FormData()
       formData.append('file', file)
-      return api.post('/mutual-funds/upload-cas', formData)
+      if (password) formData.append('password', password)
+      const { data } = await api.post('/mutual-funds/upload-cas', formData)
+      return waitForCASUpload(data.id)
     },
     onSuccess: () => {
       qc.invalidateQueries({ queryKey: ['mf-holdings'] })
       qc.invalidateQueries({ queryKey: ['mf-analysis'] })
       toast.success('CAS imported successfully')
     },
-    onError: () => toast.error('Failed to parse CAS PDF'),
+    onError: (error: Error) => toast.error(error.message || 'Failed to parse CAS PDF'),
   })
 }
@@ -0,0 +1,51 @@
+import { useEffect } from 'react'
+import { useQueryClient } from '@tanstack/react-query'
+
+interface PriceUpdate {
+  symbol: string
+  price: number | null
+}
+
+const API_URL = import.meta.env.VITE_API_URL || '/api'
+
+function repricePortfolio(portfolio: any, { symbol, price }: PriceUpdate) {
+  if (!portfolio?.holdings?.some((h: any) => h.stock_symbol === symbol)) return portfolio
+  const holdings = portfolio.holdings.map((h: any) => {
+    if (h.stock_symbol !== symbol) return h
+    const current_value = h.quantity * (price ?? h.buy_price)
+    const pnl = current_value - h.invested_value
+    return { ...h, current_price: price, current_value, pnl, pnl_percent: h.invested_value ? (pnl / h.invested_value) * 100 : 0 }
+  })
+  const current_value = holdings.reduce((sum: number, h: any) => sum + h.current_value, 0)
+  const total_pnl = current_value - portfolio.total_invested
+  return {
+    ...portfolio,
+    holdings,
+    current_value,
+    total_pnl,
+    total_pnl_percent: portfolio.total_invested ? (total_pnl / portfolio.total_invested) * 100 : 0,
+  }
+}
+
+function repriceWatchlist(items: any, { symbol, price }: PriceUpdate) {
+  if (!Array.isArray(items) || !items.some((w: any) => w.stock?.symbol === symbol)) return items
+  return items.map((w: any) => (w.stock?.symbol === symbol ? { ...w, stock: { ...w.stock, current_price: price } } : w))
+}
+
+// Keeps the portfolio and watchlist queries current from the server's price stream instead of refetching them.
+export function usePriceStream() {
+  const qc = useQueryClient()
+
+  useEffect(() => {
+    const token = localStorage.getItem('token')
+    if (!token) return
+    const source = new EventSource(`${API_URL}/stocks/prices/stream?token=${encodeURIComponent(token)}`)
+    const apply = (update: PriceUpdate) => {
+      qc.setQueryData(['portfolio'], (old: any) => repricePortfolio(old, update))
+      qc.setQueriesData({ queryKey: ['watchlist'] }, (old: any) => repriceWatchlist(old, update))
+    }
+    source.addEventListener('snapshot', (e) => JSON.parse((e as MessageEvent).data).forEach(apply))
+    source.addEventListener('price', (e) => apply(JSON.parse((e as MessageEvent).data)))
+    return () => source.close()
+  }, [qc])
+}
@@ -39,12 +39,23 @@ export function useStocks(filters: StockFilters = {}) {
   })
 }
 
+// Unknown symbols are scraped in the background: the API answers 202 with a job id,
+// which is long-polled until the scrape finishes.
+async function waitForScrapeJob(jobId: string) {
+  for (;;) {
+    const { data } = await api.get(`/stocks/jobs/${jobId}`, { params: { wait: 20 } })
+    if (data.status === 'success') return data.stock
+    if (data.status === 'failed') throw new Error(data.error || 'Scrape failed')
+  }
+}
+
 export function useStockDetail(symbol: string) {
   return useQuery({
     queryKey: ['stock', symbol],
     queryFn: async () => {
-      const { data } = await api.get(`/stocks/${symbol}`)
-      return data
+      const res = await api.get(`/stocks/${symbol}`)
+      if (res.status === 202) return waitForScrapeJob(res.data.job_id)
+      return res.data
     },
     enabled: !!symbol,
   })
@@ -55,7 +66,7 @@ export function useSearchScrape() {
   return useMutation({
     mutationFn: async (term: string) => {
       const { data } = await api.post(`/stocks/search-scrape?term=${encodeURIComponent(term)}`)
-      return data
+      return waitForScrapeJob(data.job_id)
     },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['stocks'] })
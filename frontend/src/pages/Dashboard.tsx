@@ -2,6 +2,7 @@ import { useEffect } from 'react'
 import { useAuthStore } from '../store/authStore'
 import { usePortfolioSummary } from '../hooks/usePortfolio'
 import { useWatchlist } from '../hooks/useWatchlist'
+import { usePriceStream } from '../hooks/usePriceStream'
 import { formatCurrency, formatPercent, pnlColor } from '../utils/format'
 import { Link } from 'react-router-dom'
 import StockCard from '../components/StockCard'
@@ -11,6 +12,7 @@ export default function Dashboard() {
   const user = useAuthStore((s) => s.user)
   const { data: portfolio } = usePortfolioSummary()
   const { data: watchlist } = useWatchlist()
+  usePriceStream()
 
   useEffect(() => { fetchUser() }, [fetchUser])
 
@@ -1,11 +1,13 @@
 import { useState } from 'react'
 import { usePortfolioSummary, useAddHolding, useDeleteHolding } from '../hooks/usePortfolio'
+import { usePriceStream } from '../hooks/usePriceStream'
 import { useStocks } from '../hooks/useStocks'
 import { formatCurrency, formatPercent, pnlColor } from '../utils/format'
 import PnLChart from '../components/charts/PnLChart'
 
 export default function Portfolio() {
   const { data: portfolio, isLoading } = usePortfolioSummary()
+  usePriceStream()
   const addHolding = useAddHolding()
   const deleteHolding = useDeleteHolding()
   const [showForm, setShowForm] = useState(false)
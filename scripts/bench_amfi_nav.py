@@ -0,0 +1,118 @@
+"""Benchmark AMFI NAV ingestion on a synthetic NAVAll.txt.
+
+Writes a file in AMFI's format with ``--schemes`` rows (a few N.A. NAVs and
+malformed lines included), times streaming it through the parser, and with
+``--database`` runs ``amfi_nav.ingest_nav`` into a throwaway ``amfi_bench``
+schema twice: a cold load, then a re-run of the same file, which should
+write nothing.
+
+Usage:
+    python scripts/bench_amfi_nav.py [--schemes 15000] [--out /tmp/NAVAll.txt] [--database] [--keep]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import tracemalloc
+sys.path.insert(0, "backend")
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
+from app.database import engine
+from app.models.mutual_fund import MFNavHistory, MFScheme
+from app.services import amfi_nav
+
+SCHEMA = "amfi_bench"
+
+CATEGORIES = [
+    "Open Ended Schemes(Equity Scheme - Large Cap Fund)",
+    "Open Ended Schemes(Equity Scheme - Flexi Cap Fund)",
+    "Open Ended Schemes(Equity Scheme - Small Cap Fund)",
+    "Open Ended Schemes(Debt Scheme - Liquid Fund)",
+    "Open Ended Schemes(Debt Scheme - Banking and PSU Fund)",
+    "Open Ended Schemes(Hybrid Scheme - Balanced Advantage)",
+    "Close Ended Schemes(Income)",
+]
+FUND_HOUSES = [f"Synthetic {n} Mutual Fund" for n in range(40)]
+
+
+def write_fixture(path: str, schemes: int, seed: int = 7):
+    rng = random.Random(seed)
+    code = 100000
+    per_group = max(1, schemes // (len(CATEGORIES) * len(FUND_HOUSES)))
+    with open(path, "w") as f:
+        f.write("Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date\n\n")
+        written = 0
+        while written < schemes:
+            for category in CATEGORIES:
+                f.write(f"{category}\n\n")
+                for house in FUND_HOUSES:
+                    f.write(f"{house}\n\n")
+                    for _ in range(min(per_group, schemes - written)):
+                        code += 1
+                        isin = f"INF{rng.randrange(10**8):08d}A"
+                        nav = "N.A." if rng.random() < 0.01 else f"{rng.uniform(8, 900):.4f}"
+                        f.write(f"{code};{isin};-;{house} Scheme {code} - Direct Plan - Growth;{nav};16-Oct-2026\n")
+                        written += 1
+                    if rng.random() < 0.05:
+                        f.write("this line is not a scheme;\n")
+                    if written >= schemes:
+                        return
+
+
+async def count_lines(path: str) -> int:
+    parser = amfi_nav.NavLineParser()
+    count = 0
+    async for line in amfi_nav.source_lines(path):
+        if parser.parse(line) is not None:
+            count += 1
+    return count
+
+
+async def bench_database(path: str, keep: bool):
+    async with engine.connect() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        await conn.execute(CreateTable(MFScheme.__table__))
+        await conn.execute(text("CREATE UNIQUE INDEX ix_mf_schemes_amfi_code ON mf_schemes (amfi_code)"))
+        await conn.execute(CreateTable(MFNavHistory.__table__))
+        await conn.commit()
+
+        db = AsyncSession(bind=conn)
+        for label in ("cold load", "re-run, unchanged file"):
+            summary = await amfi_nav.ingest_nav(db, path)
+            # Each batch commits separately, so the distinct xmins count the batches that rewrote rows.
+            writers = (await conn.execute(text("SELECT count(DISTINCT xmin::text) FROM mf_schemes"))).scalar()
+            print(f"{label}: {summary}, rows last written by {writers} transactions")
+        await db.close()
+
+        if not keep:
+            await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            await conn.commit()
+    await engine.dispose()
+
+
+async def main(schemes: int, out: str, database: bool, keep: bool):
+    write_fixture(out, schemes)
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = await count_lines(out)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Parsed {count} schemes from {out} in {elapsed * 1000:.0f}ms, peak {peak / 1024:.0f} KiB traced")
+
+    if database:
+        await bench_database(out, keep)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--schemes", type=int, default=15000)
+    parser.add_argument("--out", default="/tmp/NAVAll.txt")
+    parser.add_argument("--database", action="store_true", help="also ingest into a throwaway amfi_bench schema")
+    parser.add_argument("--keep", action="store_true", help="leave the amfi_bench schema in place")
+    args = parser.parse_args()
+    asyncio.run(main(args.schemes, args.out, args.database, args.keep))
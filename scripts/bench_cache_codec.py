@@ -0,0 +1,93 @@
+"""Compare cache codecs on a StockDetail-sized payload.
+
+Reports encode/decode time and encoded size for every codec/compression pair
+that is installed, against the legacy bare-JSON format. With --redis it also
+stores each encoding and reports Redis MEMORY USAGE for the key.
+
+Usage:
+    python scripts/bench_cache_codec.py [--redis]
+"""
+import asyncio
+import json
+import sys
+import timeit
+sys.path.insert(0, "backend")
+from app.services.scraper.codec import CODECS, COMPRESSIONS, CacheCodec
+
+ROUNDS = 2000
+
+
+def sample_detail() -> dict:
+    stock = {
+        "id": "3f9c1d2e-0000-4000-8000-000000000000", "symbol": "RELIANCE", "name": "Reliance Industries Ltd",
+        "sector": "Energy", "market_cap": 1954321.0, "current_price": 1444.0, "pe_ratio": 28.1, "pb_ratio": 2.3,
+        "roce": 9.69, "roe": 8.51, "dividend_yield": 0.35, "promoter_holding": 50.3,
+    }
+    return {
+        **stock,
+        "isin": "INE002A01018", "industry": "Refineries", "high_52w": 1609.0, "low_52w": 1115.0,
+        "debt_to_equity": 0.44, "eps": 51.3, "book_value": 636.0, "face_value": 10.0,
+        "sales_growth_3y": 21.4, "profit_growth_3y": 12.1,
+        "pros": "Company has reduced debt.\nCompany has a good dividend payout.",
+        "cons": "Stock is trading at 2.27 times its book value.\nLow return on equity over last 3 years.",
+        "about": "Reliance Industries is India's largest private sector company. " * 6,
+        "last_scraped_at": "2026-10-17T01:00:00",
+        "quarterly_results": [
+            {"quarter": f"Q{q % 4 + 1} {2021 + q // 4}", "revenue": 225086.0 + q * 1000, "net_profit": 19641.0 + q,
+             "eps": 25.52 + q / 10, "opm_percent": 17.0}
+            for q in range(13)
+        ],
+        "annual_results": [
+            {"fiscal_year": f"Mar {2013 + y}", "revenue": 400000.0 + y * 50000, "net_profit": 30000.0 + y * 4000,
+             "roce": 9.0, "roe": 8.5, "debt_to_equity": 0.4}
+            for y in range(12)
+        ],
+        "shareholding_patterns": [
+            {"quarter": f"Q{q % 4 + 1} {2022 + q // 4}", "promoter_percent": 50.3, "fii_percent": 22.1,
+             "dii_percent": 16.0, "public_percent": 11.3}
+            for q in range(12)
+        ],
+        "peers": [{**stock, "id": f"peer-{i}", "symbol": f"PEER{i}"} for i in range(10)],
+    }
+
+
+def legacy_encode(value):
+    return json.dumps(value).encode()
+
+
+async def redis_memory(encodings: dict[str, bytes]) -> dict[str, int]:
+    from app.services.scraper.cache import get_redis
+    r = await get_redis()
+    usage = {}
+    for label, data in encodings.items():
+        key = f"bench:codec:{label}"
+        await r.set(key, data)
+        usage[label] = await r.memory_usage(key)
+        await r.delete(key)
+    return usage
+
+
+def main(with_redis: bool):
+    value = sample_detail()
+    encoders = {"legacy-json": (legacy_encode, json.loads)}
+    for codec in CODECS:
+        for compression in COMPRESSIONS:
+            c = CacheCodec(codec, compression, compress_min_bytes=0)
+            if c.codec_id != CODECS[codec][0] or c.compression_id != COMPRESSIONS[compression][0]:
+                continue  # not installed
+            encoders[f"{codec}+{compression}"] = (c.encode, CacheCodec.decode)
+
+    encodings = {label: enc(value) for label, (enc, _) in encoders.items()}
+    memory = asyncio.run(redis_memory(encodings)) if with_redis else {}
+
+    print(f"{'format':<18}{'bytes':>8}{'encode us':>12}{'decode us':>12}{'redis bytes':>13}")
+    for label, (enc, dec) in encoders.items():
+        data = encodings[label]
+        assert dec(data) == value, label
+        enc_us = timeit.timeit(lambda: enc(value), number=ROUNDS) / ROUNDS * 1e6
+        dec_us = timeit.timeit(lambda: dec(data), number=ROUNDS) / ROUNDS * 1e6
+        print(f"{label:<18}{len(data):>8}{enc_us:>12.1f}{dec_us:>12.1f}{memory.get(label, ''):>13}")
+
+
+if __name__ == "__main__":
+    main("--redis" in sys.argv[1:])
@@ -0,0 +1,47 @@
+"""Compare event-loop lag while parsing saved screener pages inline vs in the cpu pool.
+
+Usage:
+    python scripts/bench_event_loop_lag.py PAGES_DIR [ROUNDS]
+"""
+import asyncio
+import sys
+from pathlib import Path
+sys.path.insert(0, "backend")
+from app import metrics
+from app.config import settings
+from app.services import cpu_pool
+from app.services.scraper.parsers import parse_page
+
+
+async def run(pages: list[str], rounds: int):
+    monitor = asyncio.create_task(metrics.monitor_event_loop_lag(0.01))
+    await asyncio.sleep(0.05)
+
+    for _ in range(rounds):
+        for html in pages:
+            parse_page(html)
+            await asyncio.sleep(0)
+    await asyncio.sleep(0.05)
+    inline = metrics.snapshot("event_loop.")["latency"]["event_loop.lag"]
+
+    metrics._latencies.clear()
+    cpu_pool.start_pool()
+    await asyncio.gather(*[cpu_pool.run_cpu_bound(parse_page, html) for _ in range(rounds) for html in pages])
+    await asyncio.sleep(0.05)
+    pooled = metrics.snapshot()["latency"]
+
+    monitor.cancel()
+    cpu_pool.shutdown_pool()
+    print(f"backend={settings.scraper_parser_backend} pool={settings.cpu_pool_kind}x{settings.cpu_pool_workers}")
+    print(f"inline loop lag: p99={inline['p99_ms']:.1f}ms max={inline['max_ms']:.1f}ms")
+    lag = pooled["event_loop.lag"]
+    print(f"pooled loop lag: p99={lag['p99_ms']:.1f}ms max={lag['max_ms']:.1f}ms")
+    print(f"pool run: p50={pooled['cpu_pool.run']['p50_ms']:.1f}ms wait p95={pooled['cpu_pool.wait']['p95_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+    pages = [p.read_text(encoding="utf-8") for p in sorted(Path(sys.argv[1]).glob("*.html"))]
+    asyncio.run(run(pages, int(sys.argv[2]) if len(sys.argv) > 2 else 20))
@@ -0,0 +1,112 @@
+"""Benchmark the NAV return calculator on synthetic history.
+
+Generates ``--schemes`` random-walk NAV series of ``--years`` of weekday
+NAVs, a chunk at a time like ``nav_returns.refresh_returns`` does, and times
+building each ``NavSeries`` and computing trailing (1y/3y/5y) and rolling 1y
+returns. With ``--database`` it also seeds a throwaway ``nav_bench`` schema
+with a partitioned ``mf_nav_history`` and times a full ``refresh_returns``,
+which shows how the time splits between loading and computing.
+
+Usage:
+    python scripts/bench_nav_returns.py [--schemes 15000] [--years 10] [--chunk 1000]
+    python scripts/bench_nav_returns.py --database [--db-schemes 1000] [--keep]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date, timedelta
+import numpy as np
+sys.path.insert(0, "backend")
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
+from app.database import engine
+from app.models.mutual_fund import MFNavHistory, MFScheme
+from app.services import nav_history, nav_returns
+
+SCHEMA = "nav_bench"
+
+SEED_SQL = """
+INSERT INTO mf_nav_history (scheme_id, nav_date, nav)
+SELECT s.id, d::date, 10 * exp(0.0004 * (d::date - CAST(:start AS date)) + 0.05 * sin((d::date - CAST(:start AS date)) / 40.0 + s.phase))
+FROM (SELECT id, random() * 6.28 AS phase FROM mf_schemes) AS s,
+     generate_series(CAST(:start AS timestamp), CAST(:end AS timestamp), interval '1 day') AS d
+WHERE extract(isodow FROM d) < 6
+"""
+
+
+def synthetic_rows(rng: np.random.Generator, first: int, count: int, days: np.ndarray) -> list:
+    steps = rng.normal(0.0004, 0.01, (count, len(days)))
+    navs = 10 * np.exp(np.cumsum(steps, axis=1))
+    day_list = days.tolist()
+    return [(f"scheme-{first + i:05d}", day_list, navs[i].tolist()) for i in range(count)]
+
+
+def bench_compute(schemes: int, years: int, chunk: int):
+    rng = np.random.default_rng(7)
+    today = date.today()
+    end = nav_returns.day_number(today)
+    days = np.arange(end - 365 * years, end + 1)
+    days = days[(days + 3) % 7 < 5]  # 1970-01-01 was a Thursday; keep Monday to Friday
+
+    build = compute = 0.0
+    for first in range(0, schemes, chunk):
+        rows = synthetic_rows(rng, first, min(chunk, schemes - first), days)
+        started = time.perf_counter()
+        series = nav_returns.NavSeries.from_rows(rows)
+        built = time.perf_counter()
+        trailing = nav_returns.trailing_returns(series, today)
+        nav_returns.rolling_returns(series)
+        compute += time.perf_counter() - built
+        build += built - started
+    print(
+        f"{schemes} schemes x {len(days)} NAVs ({schemes * len(days) / 1e6:.1f}M points) in chunks of {chunk}: "
+        f"build {build:.2f}s, compute {compute:.2f}s"
+    )
+    print("Last chunk median 1y/3y/5y: " + ", ".join(f"{np.nanmedian(v):.1f}%" for v in trailing.values()))
+
+
+async def bench_database(schemes: int, years: int, chunk: int, keep: bool):
+    today = date.today()
+    start = today - timedelta(days=365 * years)
+    async with engine.connect() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        await conn.execute(CreateTable(MFScheme.__table__))
+        await conn.execute(CreateTable(MFNavHistory.__table__))
+        await conn.execute(text(
+            "INSERT INTO mf_schemes (id, amfi_code, scheme_name) "
+            "SELECT gen_random_uuid()::text, g::text, 'Scheme ' || g FROM generate_series(1, :n) AS g"
+        ), {"n": schemes})
+        db = AsyncSession(bind=conn)
+        await nav_history.ensure_partitions(db, range(start.year, today.year + 1))
+        started = time.perf_counter()
+        await conn.execute(text(SEED_SQL), {"start": start, "end": today})
+        await conn.execute(text("ANALYZE mf_nav_history"))
+        await conn.commit()
+        print(f"Seeded {schemes} schemes x {years}y of NAVs in {time.perf_counter() - started:.1f}s")
+
+        summary = await nav_returns.refresh_returns(db, today, chunk)
+        print(f"refresh_returns: {summary}")
+        await db.close()
+
+        if not keep:
+            await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            await conn.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--schemes", type=int, default=15000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--chunk", type=int, default=1000)
+    parser.add_argument("--database", action="store_true", help="also time refresh_returns against a nav_bench schema")
+    parser.add_argument("--db-schemes", type=int, default=1000)
+    parser.add_argument("--keep", action="store_true", help="leave the nav_bench schema in place")
+    args = parser.parse_args()
+    bench_compute(args.schemes, args.years, args.chunk)
+    if args.database:
+        asyncio.run(bench_database(args.db_schemes, args.years, args.chunk, args.keep))
@@ -0,0 +1,121 @@
+"""Benchmark screener queries before and after the stock screener indexes.
+
+Builds a throwaway ``screener_bench`` schema in the configured database, fills
+its ``stocks`` table with synthetic rows, and runs representative
+``stock_service.list_query`` pages first with only the baseline symbol index,
+then with every index declared on ``Stock`` (the ones migration 0002 ships).
+Prints median latency and the EXPLAIN (ANALYZE, BUFFERS) plan of each query.
+
+Usage:
+    python scripts/bench_screener_indexes.py [--rows 10000] [--runs 20] [--keep]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+sys.path.insert(0, "backend")
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+from app.database import engine
+from app.models.stock import Stock
+from app.services import stock_service
+
+SCHEMA = "screener_bench"
+
+SEED_SQL = """
+INSERT INTO stocks (id, symbol, name, sector, market_cap, current_price, pe_ratio, pb_ratio, dividend_yield,
+                    roce, roe, debt_to_equity, promoter_holding, created_at)
+SELECT gen_random_uuid()::text, 'SYM' || g, 'Synthetic Company ' || g, 'Sector ' || (g % 24),
+       CASE WHEN random() < 0.05 THEN NULL ELSE round((exp(random() * 14))::numeric, 2) END,
+       round((random() * 5000)::numeric, 2),
+       CASE WHEN random() < 0.10 THEN NULL ELSE round((random() * 80)::numeric, 2) END,
+       round((random() * 12)::numeric, 2), round((random() * 5)::numeric, 2),
+       CASE WHEN random() < 0.10 THEN NULL ELSE round((random() * 45 - 5)::numeric, 2) END,
+       CASE WHEN random() < 0.10 THEN NULL ELSE round((random() * 40 - 5)::numeric, 2) END,
+       CASE WHEN random() < 0.15 THEN NULL ELSE round((random() * 3)::numeric, 2) END,
+       round((random() * 75)::numeric, 2), now()
+FROM generate_series(1, :rows) AS g
+"""
+
+QUERIES = {
+    "default page": {},
+    "sector": {"sector": "Sector 7"},
+    "quality (roce, roe)": {"min_roce": 25, "min_roe": 20},
+    "value (pe range, low debt)": {"min_pe": 8, "max_pe": 15, "max_debt_to_equity": 0.3},
+    "large caps": {"min_market_cap": 500000},
+    "deep offset page": {"page": 300},
+    "deep cursor page, no total": {"cursor": "DEEP", "with_total": False},
+    "sort by pe asc": {"sort_by": "pe_ratio", "sort_order": "asc", "min_pe": 0},
+}
+
+
+def compile_sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+async def deep_cursor(conn) -> str:
+    """Cursor equivalent to the deep offset page, so both paginations hit the same rows."""
+    row = (await conn.execute(text(
+        "SELECT market_cap, id FROM stocks ORDER BY market_cap DESC NULLS LAST, id DESC OFFSET :n LIMIT 1"
+    ), {"n": 299 * 20 - 1})).first()
+    return stock_service.encode_cursor("market_cap", True, *row) if row else ""
+
+
+async def run_queries(conn, runs: int, cursor: str) -> dict:
+    results = {}
+    for label, params in QUERIES.items():
+        params = {**params, "cursor": cursor} if params.get("cursor") else params
+        sql = compile_sql(stock_service.list_query(**params))
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            await conn.execute(text(sql))
+            timings.append((time.perf_counter() - start) * 1000)
+        plan = (await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))).scalars().all()
+        results[label] = (statistics.median(timings), plan)
+    return results
+
+
+async def main(rows: int, runs: int, keep: bool):
+    async with engine.connect() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        await conn.execute(CreateTable(Stock.__table__))
+        await conn.execute(text("CREATE UNIQUE INDEX ix_stocks_symbol ON stocks (symbol)"))
+        await conn.execute(text(SEED_SQL), {"rows": rows})
+        await conn.execute(text("ANALYZE stocks"))
+        await conn.commit()
+        cursor = await deep_cursor(conn)
+
+        before = await run_queries(conn, runs, cursor)
+        for index in Stock.__table__.indexes:
+            if index.name != "ix_stocks_symbol":
+                await conn.run_sync(lambda sync_conn, index=index: index.create(sync_conn))
+        await conn.execute(text("ANALYZE stocks"))
+        await conn.commit()
+        after = await run_queries(conn, runs, cursor)
+
+        for label in QUERIES:
+            (before_ms, before_plan), (after_ms, after_plan) = before[label], after[label]
+            print(f"\n=== {label}: {before_ms:.2f} ms -> {after_ms:.2f} ms ({before_ms / after_ms:.1f}x)")
+            print("--- before")
+            print("\n".join(before_plan))
+            print("--- after")
+            print("\n".join(after_plan))
+
+        if not keep:
+            await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            await conn.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="leave the screener_bench schema in place")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.runs, args.keep))
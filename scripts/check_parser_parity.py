@@ -0,0 +1,61 @@
+"""Check that every scraper parser backend matches the saved golden output.
+
+Usage:
+    python scripts/check_parser_parity.py PAGES_DIR [--update]
+
+PAGES_DIR holds saved screener pages (SYMBOL.html). --update (re)writes
+SYMBOL.json goldens from the reference html.parser backend; without it every
+backend is compared against the goldens and timed.
+
+backend/tests/fixtures/screener is a committed set whose goldens came from the
+original BeautifulSoup scraper (backend/tests/test_screener_parsers.py checks
+it); compare against it, but don't --update it.
+"""
+import json
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, "backend")
+from app.services.scraper.parsers import BACKENDS, parse_page
+
+REFERENCE = "html.parser"
+
+
+def main(pages_dir: Path, update: bool) -> int:
+    pages = sorted(pages_dir.glob("*.html"))
+    if not pages:
+        print(f"No .html pages in {pages_dir}")
+        return 1
+
+    if update:
+        for page in pages:
+            data = parse_page(page.read_text(encoding="utf-8"), REFERENCE)
+            page.with_suffix(".json").write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Wrote {len(pages)} goldens")
+        return 0
+
+    failures = 0
+    for backend in BACKENDS:
+        elapsed = 0.0
+        for page in pages:
+            golden_path = page.with_suffix(".json")
+            if not golden_path.exists():
+                print(f"Missing golden for {page.name}; run with --update")
+                return 1
+            html = page.read_text(encoding="utf-8")
+            started = time.perf_counter()
+            data = parse_page(html, backend)
+            elapsed += time.perf_counter() - started
+            # Round-trip through JSON so tuples/floats compare the same way as the golden.
+            if json.loads(json.dumps(data)) != json.loads(golden_path.read_text(encoding="utf-8")):
+                print(f"[{backend}] MISMATCH {page.name}")
+                failures += 1
+        print(f"[{backend}] {len(pages)} pages in {elapsed * 1000:.1f}ms")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+    sys.exit(main(Path(sys.argv[1]), "--update" in sys.argv[2:]))
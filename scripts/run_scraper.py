@@ -1,12 +1,11 @@
 """Run scraper for a single stock or all seeded stocks."""
 import asyncio
 import sys
-import time
 sys.path.insert(0, "backend")
 from app.database import async_session
+from app.services.scraper.bulk import BulkScraper
 from app.services.scraper.screener_scraper import ScreenerScraper
 from app.models.stock import Stock
-from app.config import settings
 from sqlalchemy import select
 
 
@@ -22,12 +21,10 @@ async def scrape_all():
         result = await db.execute(select(Stock.symbol))
         symbols = [r[0] for r in result.all()]
 
-    for sym in symbols:
-        try:
-            await scrape_one(sym)
-            time.sleep(settings.scraper_rate_limit_seconds)
-        except Exception as e:
-            print(f"Error: {sym}: {e}")
+    outcome = await BulkScraper().run(symbols)
+    for sym, error in outcome.failed.items():
+        print(f"Error: {sym}: {error}")
+    print(f"Scraped {len(outcome.succeeded)}/{len(symbols)} stocks in {outcome.elapsed_seconds:.1f}s")
 
 
 if __name__ == "__main__":